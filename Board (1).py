@@ -3,6 +3,66 @@
 ##################################
 
 
+# returns the parity (0 or 1) that no slide can change: the parity of the permutation of the
+# non-blank tiles in row-major order, plus the blank's row when the board has an even width.
+# Runs in O(n log n) for n cells by counting cycles instead of inversions.
+def move_parity(tiles, cols):
+    order = sorted((val, idx) for idx, val in enumerate(val for val in tiles if val != 0))
+    position = [idx for val, idx in order]
+    seen = [False] * len(position)
+    cycles = 0
+    for start in range(len(position)):
+        if not seen[start]:
+            cycles += 1
+            i = start
+            while not seen[i]:
+                seen[i] = True
+                i = position[i]
+    parity = (len(position) - cycles) % 2
+    if cols % 2 == 0:
+        parity += tiles.index(0) // cols
+    return parity % 2
+
+
+# returns the number of bits used for each tile when a board with the given number of cells is
+# hashed or packed: 4 (as for the 15-puzzle) or enough for the largest tile on bigger boards
+def cell_bits(size):
+    return max(4, (size - 1).bit_length())
+
+
+# returns the Lehmer-code rank of a permutation of 0..n-1: a perfect, collision-free index
+# in [0, n!) that permutation_unrank turns back into the permutation. O(n^2) for n cells.
+def permutation_rank(tiles):
+    size = len(tiles)
+    rank = 0
+    for i, val in enumerate(tiles):
+        smaller = 0
+        for later in tiles[i + 1:]:
+            if later < val:
+                smaller += 1
+        rank = rank * (size - i) + smaller
+    return rank
+
+
+def permutation_unrank(rank, size):
+    digits = [0] * size
+    for i in range(size - 1, -1, -1):
+        rank, digits[i] = divmod(rank, size - i)
+    remaining = list(range(size))
+    return [remaining.pop(digit) for digit in digits]
+
+
+# returns True if goal_board can be reached from board by sliding the blank
+def is_solvable(board, goal_board):
+    rows, cols = len(board.matrix), len(board.matrix[0])
+    if (rows, cols) != (len(goal_board.matrix), len(goal_board.matrix[0])):
+        return False
+    tiles, goal_tiles = board.tiles(), goal_board.tiles()
+    if sorted(tiles) != sorted(goal_tiles):
+        return False
+    return move_parity(tiles, cols) == move_parity(goal_tiles, cols)
+
+
 class Board:
     """
         This class represents the actual Board of the game
@@ -25,19 +85,16 @@ class Board:
 
     # A function to provide a string description of the board
     def __str__(self):
-        largestDigitNumInColumns = [1, 1, 1, 1]
+        largestDigitNumInColumns = [1] * len(self.matrix[0])
         for column in range(len(self.matrix[0])):
             for row in range(len(self.matrix)):
-                if self.matrix[row][column] >= 10:
-                    largestDigitNumInColumns[column] = 2
+                largestDigitNumInColumns[column] = max(largestDigitNumInColumns[column],
+                                                       len(str(self.matrix[row][column])))
         s = ""
         for row in range(len(self.matrix)):
             s += "["
             for column in range(len(self.matrix[0])):
-                if largestDigitNumInColumns[column] == 2 and self.matrix[row][column] < 10:
-                    s += " " + str(self.matrix[row][column])
-                else:
-                    s += str(self.matrix[row][column])
+                s += str(self.matrix[row][column]).rjust(largestDigitNumInColumns[column])
                 if (column != len(self.matrix[0]) - 1):
                     s += ", "
             s += "]\n"
@@ -49,6 +106,8 @@ class Board:
 
     # A function to checks if two Boards are equal
     def __eq__(self, other):
+        if isinstance(other, PackedBoard):
+            return other == self
         if not isinstance(other, Board):
             return False
         return self.matrix == other.matrix
@@ -66,6 +125,24 @@ class Board:
                     return (r, c)
         return None
 
+    # the flat (row * cols + col) index of the blank
+    @property
+    def blankIdx(self):
+        return self.blankPos[0] * len(self.matrix[0]) + self.blankPos[1]
+
+    # A function that checks if goal_board can be reached from this board (see is_solvable)
+    def is_solvable(self, goal_board):
+        return is_solvable(self, goal_board)
+
+    # returns the tile stored in the given flat (row * cols + col) cell index
+    def tile(self, idx):
+        cols = len(self.matrix[0])
+        return self.matrix[idx // cols][idx % cols]
+
+    # returns every tile in row-major order as a flat list
+    def tiles(self):
+        return [val for row in self.matrix for val in row]
+
     # A function that puts the four sliding functions together, and takes direction as input
     # move is a tuple representing (delta Y, delta X)
     def slide_blank(self, move):
@@ -85,10 +162,255 @@ class Board:
             new_board.blankPos = (new_r, new_c)
             return new_board
 
+    # Slides the blank in place instead of building a new Board, so a search can undo it by
+    # sliding back the opposite way. Returns False (leaving the board unchanged) if the move is off the board
+    def move_blank(self, move):
+        cur_r, cur_c = self.blankPos
+        new_r, new_c = cur_r + move[0], cur_c + move[1]
+        if not (0 <= new_r < len(self.matrix) and 0 <= new_c < len(self.matrix[0])):
+            return False
+        self.matrix[cur_r][cur_c] = self.matrix[new_r][new_c]
+        self.matrix[new_r][new_c] = 0
+        self.blankPos = (new_r, new_c)
+        return True
+
+    # Each tile takes cell_bits(rows * cols) bits, so the value is unique for any board whose
+    # tiles are 0..n-1 (and equals the PackedBoard state, which is 16 per tile up to 4x4)
     def __hash__(self):
+        bits = cell_bits(len(self.matrix) * len(self.matrix[0]))
         s = 0
         for row in self.matrix:
             for val in row:
-                s *= 16  # this must be equal to w*h
-                s += val
+                s = (s << bits) + val
         return s
+
+    # returns the perfect (collision-free) index of this board among all n! arrangements of
+    # tiles 0..n-1 (See permutation_rank)
+    def rank(self):
+        return permutation_rank(self.tiles())
+
+    # A function that builds the board with the given rank (See rank)
+    @classmethod
+    def from_rank(cls, rank, rows, cols):
+        tiles = permutation_unrank(rank, rows * cols)
+        return cls([tiles[r * cols:(r + 1) * cols] for r in range(rows)])
+
+    # A function that returns the packed (single int) form of this board (See PackedBoard Class)
+    def pack(self):
+        return PackedBoard(self.matrix)
+
+
+##################################
+# PackedBoard Class
+##################################
+
+
+class _PackedGeometry:
+    """
+        The per-size lookup tables shared by every PackedBoard of the same dimensions
+
+        rows, cols - the dimensions of the board
+        bits, mask - the bits per tile (See cell_bits) and the mask for one tile
+        shifts - shifts[i] is the bit offset of the tile in flat cell i
+        targets - maps each move to a list where targets[move][i] is the flat index the
+                  blank moves to from cell i, or -1 if the move would leave the board
+    """
+
+    __slots__ = ('rows', 'cols', 'bits', 'mask', 'shifts', 'targets')
+
+    def __init__(self, rows, cols):
+        self.rows = rows
+        self.cols = cols
+        size = rows * cols
+        self.bits = cell_bits(size)
+        self.mask = (1 << self.bits) - 1
+        self.shifts = [self.bits * (size - 1 - i) for i in range(size)]
+        self.targets = {}
+        for move in [(0, 1), (0, -1), (-1, 0), (1, 0)]:
+            delta_r, delta_c = move
+            cells = []
+            for i in range(size):
+                new_r, new_c = i // cols + delta_r, i % cols + delta_c
+                if 0 <= new_r < rows and 0 <= new_c < cols:
+                    cells.append(new_r * cols + new_c)
+                else:
+                    cells.append(-1)
+            self.targets[move] = cells
+
+
+class PackedBoard:
+    """
+        An immutable, compact form of a Board that fits the whole puzzle into a single int
+
+        state - every tile stored in cell_bits(rows * cols) bits (4 up to the 15-puzzle), row-major,
+                with the first cell in the most significant position (so hash(PackedBoard) == hash(Board)
+                for the same matrix)
+        blankIdx - the flat (row * cols + col) index of the blank, cached so sliding never scans
+        geometry - the shared lookup tables for boards of this size (See _PackedGeometry Class)
+
+        Hashing and equality are O(1) int operations, and slide_blank only builds the new int.
+        Any m x n board can be packed; up to 16 cells the state fits in 64 bits.
+    """
+
+    __slots__ = ('state', 'blankIdx', 'geometry')
+
+    _geometries = {}
+
+    def __init__(self, matrix):
+        rows, cols = len(matrix), len(matrix[0])
+        geometry = PackedBoard.geometry_for(rows, cols)
+        state = 0
+        blankIdx = None
+        for r, row in enumerate(matrix):
+            for c, val in enumerate(row):
+                if not 0 <= val <= geometry.mask:
+                    raise ValueError("Invalid Matrix!")
+                if val == 0:
+                    blankIdx = r * cols + c
+                state = (state << geometry.bits) | val
+        if blankIdx is None:
+            raise ValueError("Invalid Matrix!")
+        self.state = state
+        self.blankIdx = blankIdx
+        self.geometry = geometry
+
+    # returns the (cached) lookup tables for boards with the given dimensions
+    @classmethod
+    def geometry_for(cls, rows, cols):
+        geometry = cls._geometries.get((rows, cols))
+        if geometry is None:
+            geometry = cls._geometries[(rows, cols)] = _PackedGeometry(rows, cols)
+        return geometry
+
+    # builds a PackedBoard straight from its fields without re-packing a matrix
+    @classmethod
+    def from_state(cls, state, blankIdx, geometry):
+        board = object.__new__(cls)
+        board.state = state
+        board.blankIdx = blankIdx
+        board.geometry = geometry
+        return board
+
+    @property
+    def rows(self):
+        return self.geometry.rows
+
+    @property
+    def cols(self):
+        return self.geometry.cols
+
+    @property
+    def blankPos(self):
+        return divmod(self.blankIdx, self.geometry.cols)
+
+    # the list-of-lists form of the board; this unpacks the state, so avoid it in hot loops
+    @property
+    def matrix(self):
+        return self.unpack().matrix
+
+    # returns the tile stored in the given flat cell index
+    def tile(self, idx):
+        return (self.state >> self.geometry.shifts[idx]) & self.geometry.mask
+
+    # A function that checks if goal_board can be reached from this board (see is_solvable)
+    def is_solvable(self, goal_board):
+        return is_solvable(self, goal_board)
+
+    # returns every tile in row-major order as a flat list
+    def tiles(self):
+        state, shifts, mask = self.state, self.geometry.shifts, self.geometry.mask
+        return [(state >> shift) & mask for shift in shifts]
+
+    # returns the perfect (collision-free) index of this board among all n! arrangements (See Board.rank)
+    def rank(self):
+        return permutation_rank(self.tiles())
+
+    # A function to convert this back into a regular (mutable) Board
+    def unpack(self):
+        cols = self.geometry.cols
+        tiles = self.tiles()
+        return Board([tiles[r:r + cols] for r in range(0, len(tiles), cols)])
+
+    def __str__(self):
+        return str(self.unpack())
+
+    def __repr__(self):
+        return f'PackedBoard({self.matrix})'
+
+    # Two PackedBoards are equal if they have the same dimensions and the same packed state
+    def __eq__(self, other):
+        if isinstance(other, PackedBoard):
+            return self.state == other.state and self.geometry is other.geometry
+        if isinstance(other, Board):
+            return (self.rows == len(other.matrix) and self.cols == len(other.matrix[0])
+                    and self.state == other.__hash__())
+        return False
+
+    def __hash__(self):
+        return self.state
+
+    # PackedBoards are immutable, so there is nothing to copy
+    def duplicate(self):
+        return self
+
+    # A function that returns a tuple containing the (row, col) position of the given element in the board
+    def find_element(self, elem):
+        for i in range(self.geometry.rows * self.geometry.cols):
+            if self.tile(i) == elem:
+                return divmod(i, self.geometry.cols)
+        return None
+
+    # Same contract as Board.slide_blank, but swaps two nibbles instead of copying the matrix
+    def slide_blank(self, move):
+        geometry = self.geometry
+        targets = geometry.targets.get(move)
+        if targets is None:
+            raise ValueError("Invalid move")
+        target = targets[self.blankIdx]
+        if target < 0:
+            return None
+        shifts = geometry.shifts
+        tile = (self.state >> shifts[target]) & geometry.mask
+        state = self.state ^ (tile << shifts[target]) ^ (tile << shifts[self.blankIdx])
+        return PackedBoard.from_state(state, target, geometry)
+
+
+##################################
+# RankBitmap Class
+##################################
+
+
+class RankBitmap:
+    """
+        A dense set of boards of one size, holding one bit per possible board (indexed by Board.rank)
+        instead of a hash table entry. Supports add, in and len, so it can stand in for the
+        visited set of the breadth-first searches in a3_PeterManolis.
+
+        rows, cols - the dimensions of the boards it holds
+        bits - the bitmap itself: (rows * cols)! bits, e.g. 45 KB for 3x3 and 5 KB for 2x4
+
+        Only practical for small boards: n! grows quickly (4x4 would need 2.6 TB).
+    """
+
+    def __init__(self, rows, cols):
+        size = 1
+        for i in range(2, rows * cols + 1):
+            size *= i
+        self.rows = rows
+        self.cols = cols
+        self.bits = bytearray((size + 7) // 8)
+        self.count = 0
+
+    def add(self, board):
+        rank = board.rank()
+        byte, bit = rank >> 3, 1 << (rank & 7)
+        if not self.bits[byte] & bit:
+            self.bits[byte] |= bit
+            self.count += 1
+
+    def __contains__(self, board):
+        rank = board.rank()
+        return bool(self.bits[rank >> 3] & (1 << (rank & 7)))
+
+    def __len__(self):
+        return self.count
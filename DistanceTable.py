@@ -0,0 +1,358 @@
+#!/usr/bin/python3
+
+##################################
+# Exact Distance Tables
+##################################
+# Enumerates the whole state space of a sliding puzzle with an external-memory breadth-first
+# search from the goal, and stores the exact number of moves to the goal for every solvable board.
+#
+# The search keeps each layer (all boards at one distance) on disk as a sorted file of packed
+# states (see Board.PackedBoard), each written as a fixed-width big-endian integer. The next layer
+# is made by streaming the current layer, collecting successors into a bounded buffer that is
+# sorted and spilled as a run file whenever it fills, and then merging the runs while dropping
+# every state already in the current or previous layer (a slide changes the distance by exactly
+# one, so no older layer can hold a successor). Runs are merged at most merge_width at a time, in
+# several passes when a layer spills more runs than that, so memory is bounded by buffer_size
+# states plus merge_width read blocks, and open files by merge_width, no matter how big the
+# state space is.
+#
+# The finished table holds one byte per solvable board, indexed by solvable_rank, and is
+# memory-mapped when loaded. It can be used as a perfect heuristic or asked for an optimal path.
+#
+# Usage:
+#     python DistanceTable.py 3x3 dist_3x3.bin --work-directory layers
+#     table = DistanceTable.DistanceTable('dist_3x3.bin')
+#     a3_PeterManolis.a_star_solver(start_board, goal_board, table)
+
+import argparse
+import heapq
+import mmap
+import os
+import struct
+import sys
+
+import Board
+
+MAGIC = b'DST1'
+HEADER = struct.Struct('<4sBB')
+UNKNOWN = 255
+DEFAULT_BUFFER = 1 << 20
+DEFAULT_MERGE_WIDTH = 16
+MOVES = [(0, 1), (0, -1), (1, 0), (-1, 0)]
+
+
+#################################
+# Ranking Solvable Boards
+#################################
+# A board is its blank cell plus the order of the other tiles. For a fixed blank cell exactly half
+# of the tile orders are solvable (see Board.move_parity), and the Lehmer ranks 2k and 2k + 1 differ
+# by swapping the last two tiles, so exactly one of each pair is solvable. That gives a perfect
+# index of the n! / 2 solvable boards: blank cell * ((n - 1)! / 2) + rank of the tile order // 2.
+
+def solvable_count(size):
+    count = 1
+    for i in range(2, size + 1):
+        count *= i
+    return count // 2
+
+
+# returns the index of a board among the solvable boards of its size; only meaningful for boards
+# that are solvable (an unsolvable board shares its index with a solvable one)
+def solvable_rank(tiles):
+    size = len(tiles)
+    order = [val - 1 for val in tiles if val != 0]
+    return tiles.index(0) * (solvable_count(size - 1)) + Board.permutation_rank(order) // 2
+
+
+#################################
+# External-Memory Search
+#################################
+
+def _width(geometry):
+    return (geometry.rows * geometry.cols * geometry.bits + 7) // 8
+
+
+# yields the states stored in a layer or run file, in file order
+def _read_states(path, width, block=1 << 16):
+    with open(path, 'rb') as f:
+        while True:
+            data = f.read(width * block)
+            if not data:
+                return
+            for i in range(0, len(data), width):
+                yield int.from_bytes(data[i:i + width], 'big')
+
+
+# writes states to path and returns how many were written
+def _write_states(path, states, width, block=1 << 16):
+    count = 0
+    buffer = bytearray()
+    with open(path, 'wb') as f:
+        for state in states:
+            buffer += state.to_bytes(width, 'big')
+            count += 1
+            if count % block == 0:
+                f.write(buffer)
+                buffer.clear()
+        f.write(buffer)
+    return count
+
+
+# yields each state of a sorted stream once
+def _unique(states):
+    previous = None
+    for state in states:
+        if state != previous:
+            yield state
+            previous = state
+
+
+# yields the states of the sorted stream states that are not in the sorted stream seen
+def _difference(states, seen):
+    seen = iter(seen)
+    other = next(seen, None)
+    for state in states:
+        while other is not None and other < state:
+            other = next(seen, None)
+        if other != state:
+            yield state
+
+
+# merges sorted run files, at most merge_width at a time, until no more than merge_width are left;
+# returns the remaining runs (inputs of each merge are deleted once it is written)
+def _merge_runs(runs, width, merge_width, directory, depth):
+    merge_pass = 0
+    while len(runs) > merge_width:
+        merged = []
+        for start in range(0, len(runs), merge_width):
+            group = runs[start:start + merge_width]
+            if len(group) == 1:
+                merged.append(group[0])
+                continue
+            merged.append(os.path.join(directory, f'run_{depth:03d}_p{merge_pass}_{len(merged):05d}.bin'))
+            _write_states(merged[-1], _unique(heapq.merge(*[_read_states(run, width) for run in group])), width)
+            for run in group:
+                os.remove(run)
+        runs = merged
+        merge_pass += 1
+    return runs
+
+
+# returns the flat index of the blank in a packed state
+def _blank_index(state, geometry):
+    mask = geometry.mask
+    for idx, shift in enumerate(geometry.shifts):
+        if not (state >> shift) & mask:
+            return idx
+    raise ValueError("Packed state has no blank")
+
+
+def layer_path(directory, depth):
+    return os.path.join(directory, f'layer_{depth:03d}.bin')
+
+
+def external_layers(goal_board, directory, buffer_size=DEFAULT_BUFFER, keep_layers=True,
+                    merge_width=DEFAULT_MERGE_WIDTH):
+    """
+        Generator for the external-memory breadth-first search from goal_board. Yields
+        (depth, path of the layer file, number of states in it) for every layer, starting with the
+        goal at depth 0, and stops when a layer comes out empty. Layer and run files go in directory.
+        At most buffer_size successor states are held in memory at once, and at most merge_width run
+        files are open (each with one read block buffered) while merging. Unless keep_layers is True,
+        each layer file is deleted once it can no longer be needed (two layers later), so read a
+        layer before asking for the next one.
+    """
+    if merge_width < 2:
+        raise ValueError("external_layers needs to merge at least 2 runs at a time")
+    os.makedirs(directory, exist_ok=True)
+    goal = goal_board if isinstance(goal_board, Board.PackedBoard) else goal_board.pack()
+    geometry = goal.geometry
+    width = _width(geometry)
+    paths = [layer_path(directory, 0)]
+    _write_states(paths[0], [goal.state], width)
+    yield 0, paths[0], 1
+
+    depth = 0
+    while True:
+        runs = []
+        buffer = set()
+        for state in _read_states(paths[depth], width):
+            board = Board.PackedBoard.from_state(state, _blank_index(state, geometry), geometry)
+            for move in MOVES:
+                child = board.slide_blank(move)
+                if child is not None:
+                    buffer.add(child.state)
+            if len(buffer) >= buffer_size:
+                runs.append(os.path.join(directory, f'run_{depth + 1:03d}_{len(runs):05d}.bin'))
+                _write_states(runs[-1], sorted(buffer), width)
+                buffer.clear()
+        if buffer:
+            runs.append(os.path.join(directory, f'run_{depth + 1:03d}_{len(runs):05d}.bin'))
+            _write_states(runs[-1], sorted(buffer), width)
+            buffer.clear()
+
+        runs = _merge_runs(runs, width, merge_width, directory, depth + 1)
+        older = [_read_states(paths[depth], width)]
+        if depth > 0:
+            older.append(_read_states(paths[depth - 1], width))
+        successors = _unique(heapq.merge(*[_read_states(run, width) for run in runs]))
+        paths.append(layer_path(directory, depth + 1))
+        count = _write_states(paths[-1], _difference(successors, heapq.merge(*older)), width)
+        for run in runs:
+            os.remove(run)
+        if not keep_layers and depth > 0:
+            os.remove(paths[depth - 1])
+        if count == 0:
+            os.remove(paths[-1])
+            if not keep_layers:
+                os.remove(paths[depth])
+            return
+        depth += 1
+        yield depth, paths[depth], count
+
+
+def build_distance_table(path, goal_board, work_directory, buffer_size=DEFAULT_BUFFER, keep_layers=False,
+                         log=None, merge_width=DEFAULT_MERGE_WIDTH):
+    """
+        Runs external_layers from goal_board and writes the distance table to path (through a
+        temporary file renamed into place, as PatternDatabase.write_table does).
+        Layout: MAGIC, rows, cols, the goal tiles, then one byte per solvable board (see solvable_rank):
+        its distance from the goal, or UNKNOWN if the search never reached it.
+        The table is filled through a memory map, so it is not held in process memory either.
+        Returns the number of boards in each layer. If log is a file, layer sizes are printed to it.
+    """
+    rows, cols = len(goal_board.matrix), len(goal_board.matrix[0])
+    size = rows * cols
+    goal_tiles = goal_board.tiles()
+    count = solvable_count(size)
+    offset = HEADER.size + size
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, rows, cols))
+        f.write(bytes(goal_tiles))
+        chunk = bytes([UNKNOWN]) * (1 << 20)
+        for start in range(0, count, len(chunk)):
+            f.write(chunk[:count - start])
+
+    geometry = Board.PackedBoard.geometry_for(rows, cols)
+    width = _width(geometry)
+    mask = geometry.mask
+    shifts = geometry.shifts
+    layers = []
+    with open(temp_path, 'r+b') as f:
+        table = mmap.mmap(f.fileno(), 0)
+        try:
+            for depth, layer, layer_count in external_layers(goal_board, work_directory, buffer_size, keep_layers,
+                                                               merge_width):
+                if depth >= UNKNOWN:
+                    raise ValueError("Distances over 254 moves do not fit in the table")
+                for state in _read_states(layer, width):
+                    table[offset + solvable_rank([(state >> shift) & mask for shift in shifts])] = depth
+                layers.append(layer_count)
+                if log is not None:
+                    print(f'depth {depth}: {layer_count} boards', file=log)
+            table.flush()
+        finally:
+            table.close()
+    os.replace(temp_path, path)
+    return layers
+
+
+##################################
+# DistanceTable Class
+##################################
+
+
+class DistanceTable:
+    """
+        A memory-mapped table of exact distances to one goal board
+
+        rows, cols - the dimensions of the boards in the table
+        goalTiles - the flat goal board the distances are measured to
+        table - a read-only view of the on-disk table, table[solvable_rank(tiles)] = moves to the goal
+
+        Calling it gives the exact distance, so it can be passed anywhere a3_PeterManolis accepts a
+        heuristic; A* then expands only the States on an optimal path.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.rows, self.cols = HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a distance table")
+        size = self.rows * self.cols
+        self.goalTiles = list(self._map[HEADER.size:HEADER.size + size])
+        self.table = memoryview(self._map)[HEADER.size + size:]
+        if len(self.table) != solvable_count(size):
+            raise ValueError(f"{path} is truncated")
+        self._goal_board = Board.Board([self.goalTiles[r * self.cols:(r + 1) * self.cols]
+                                        for r in range(self.rows)])
+
+    # loads the table for goal_board from path, running the search first if the file is missing
+    @classmethod
+    def load_or_build(cls, path, goal_board, work_directory, buffer_size=DEFAULT_BUFFER):
+        if not os.path.exists(path):
+            build_distance_table(path, goal_board, work_directory, buffer_size)
+        table = cls(path)
+        if table.goalTiles != goal_board.tiles():
+            raise ValueError(f"{path} was built for a different goal board")
+        return table
+
+    # returns the number of moves from board to the goal, or None if the goal cannot be reached
+    def distance(self, board):
+        if not board.is_solvable(self._goal_board):
+            return None
+        value = self.table[solvable_rank(board.tiles())]
+        return None if value == UNKNOWN else value
+
+    def __call__(self, current_board, goal_board=None):
+        if goal_board is not None and goal_board.tiles() != self.goalTiles:
+            raise ValueError("DistanceTable was built for a different goal board")
+        return self.distance(current_board)
+
+    # returns an optimal solution as a list of moves (see Board.slide_blank), or None if there is none,
+    # by always sliding to a neighbor one move closer to the goal
+    def moves(self, board):
+        distance = self.distance(board)
+        if distance is None:
+            return None
+        path = []
+        while distance > 0:
+            for move in MOVES:
+                child = board.slide_blank(move)
+                if child is not None and self.table[solvable_rank(child.tiles())] == distance - 1:
+                    break
+            path.append(move)
+            board = child
+            distance -= 1
+        return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build an exact distance table for a sliding puzzle.')
+    parser.add_argument('shape', help='board shape as ROWSxCOLS, e.g. 3x3 or 2x5')
+    parser.add_argument('output', help='where to write the table')
+    parser.add_argument('--goal', help='goal board tiles (default: 1..n with the blank last)')
+    parser.add_argument('--work-directory', default='layers', help='where layer and run files are kept')
+    parser.add_argument('--buffer-size', type=int, default=DEFAULT_BUFFER, help='states held in memory at once')
+    parser.add_argument('--merge-width', type=int, default=DEFAULT_MERGE_WIDTH,
+                        help='run files merged at once (and so kept open)')
+    parser.add_argument('--keep-layers', action='store_true', help='keep the sorted layer files')
+    args = parser.parse_args(argv)
+
+    rows, cols = (int(n) for n in args.shape.lower().split('x'))
+    if args.goal:
+        tiles = [int(val) for val in args.goal.replace(',', ' ').split()]
+    else:
+        tiles = list(range(1, rows * cols)) + [0]
+    if len(tiles) != rows * cols:
+        parser.error(f'Expected {rows * cols} goal tiles but got {len(tiles)}')
+    goal_board = Board.Board([tiles[r * cols:(r + 1) * cols] for r in range(rows)])
+    layers = build_distance_table(args.output, goal_board, args.work_directory, args.buffer_size,
+                                  args.keep_layers, sys.stderr, args.merge_width)
+    print(f'{sum(layers)} boards, largest distance {len(layers) - 1}', file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+##################################
+# OpenList Classes
+##################################
+# Fringes for informed_solver in a3_PeterManolis. A plain list used with heapq is still the
+# default; these classes share a small interface instead:
+#     push(state)  - adds a State
+#     pop()        - removes and returns the State to expand next, or None if none are left
+#     len(fringe)  - the number of stored entries (stale ones included)
+#     stats        - a dict of counters describing the run
+
+import heapq
+
+
+class BestGOpenList:
+    """
+        A heap-based fringe that remembers the best depth (g) seen for every board
+
+        heap - (f-value, -depth, State) entries, so ties on f go to the deeper State
+        bestG - board -> the smallest depth any pushed State had for that board
+        stats - 'pushed': States added to the heap
+                'skipped': pushes refused because the board was already known at a depth as good
+                'stale': States thrown away when popped because a better one was pushed later
+
+        A push that does not improve a board's best g is dropped, so the heap never holds two
+        copies of a board with the same or worse g. Decrease-key is done lazily: an improved State
+        is pushed, and the outdated entry is discarded (and counted) when it reaches the top.
+    """
+
+    def __init__(self):
+        self.heap = []
+        self.bestG = {}
+        self.stats = {'pushed': 0, 'skipped': 0, 'stale': 0}
+
+    def __len__(self):
+        return len(self.heap)
+
+    def push(self, state):
+        best = self.bestG.get(state.board)
+        if best is not None and best <= state.depth:
+            self.stats['skipped'] += 1
+            return
+        self.bestG[state.board] = state.depth
+        heapq.heappush(self.heap, (state.fvalue, -state.depth, state))
+        self.stats['pushed'] += 1
+
+    def pop(self):
+        while self.heap:
+            state = heapq.heappop(self.heap)[2]
+            if state.depth > self.bestG[state.board]:
+                self.stats['stale'] += 1
+                continue
+            return state
+        return None
+
+
+class BucketOpenList:
+    """
+        A bucket queue for integer f-values: push and pop are O(1) (amortized) with no comparisons
+
+        buckets - buckets[f][g] is a LIFO list of the States with f-value f and depth g;
+                  each buckets[f] is trimmed so its last list (the largest g) is never empty
+        minF - no bucket below this f-value holds a State
+        stats - 'pushed': States added
+
+        pop takes the most recently pushed State with the smallest f and, among those, the largest
+        g. Preferring deeper States on the last f-layer reaches the goal with fewer expansions.
+        f-values must be non-negative integers (as from ucs_f_function or A* with an integer heuristic).
+    """
+
+    def __init__(self):
+        self.buckets = []
+        self.minF = 0
+        self.size = 0
+        self.stats = {'pushed': 0}
+
+    def __len__(self):
+        return self.size
+
+    def push(self, state):
+        f, g = state.fvalue, state.depth
+        if not isinstance(f, int) or f < 0:
+            raise ValueError(f"BucketOpenList needs non-negative integer f-values, got {f!r}")
+        buckets = self.buckets
+        while len(buckets) <= f:
+            buckets.append([])
+        layer = buckets[f]
+        while len(layer) <= g:
+            layer.append([])
+        layer[g].append(state)
+        if f < self.minF:
+            self.minF = f
+        self.size += 1
+        self.stats['pushed'] += 1
+
+    def pop(self):
+        if not self.size:
+            return None
+        buckets = self.buckets
+        while not buckets[self.minF]:
+            self.minF += 1
+        layer = buckets[self.minF]
+        state = layer[-1].pop()
+        while layer and not layer[-1]:
+            layer.pop()
+        self.size -= 1
+        return state
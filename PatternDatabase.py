@@ -0,0 +1,259 @@
+#!/usr/bin/python3
+
+##################################
+# Pattern Database Heuristics
+##################################
+# Disjoint additive pattern databases (PDBs) for the sliding puzzles in a3_PeterManolis.
+#
+# A pattern is a subset of the tiles. Its database stores, for every placement of those tiles,
+# the fewest moves OF THOSE TILES needed to bring them to their goal cells (moves of the other
+# tiles are free). Because no move is counted by two patterns, the values of disjoint patterns
+# can be added and the sum is still admissible.
+#
+# Tables are built once by a retrograde (backwards from the goal) breadth-first search over
+# abstract states, written to disk as one byte per placement indexed by permutation rank, and
+# memory-mapped when loaded. Later processes open the file instead of rebuilding it, and every
+# process that maps the same file shares its pages.
+#
+# Usage:
+#     heuristic = PatternDatabase.AdditivePatternDatabase(goal_board, '5-5-5', 'pdbs')
+#     a3_PeterManolis.a_star_solver(start_board, goal_board, heuristic)
+
+import collections
+import mmap
+import os
+import struct
+
+MAGIC = b'PDB1'
+HEADER = struct.Struct('<4sBBB')
+UNKNOWN = 255
+
+# Standard partitions, given as groups of goal CELLS (row * cols + col) so they fit any goal board.
+# The goal blank is dropped from whichever group holds its cell.
+PARTITIONS = {
+    (3, 3): {
+        '4-4': [(0, 1, 3, 4), (2, 5, 6, 7, 8)],
+        '8': [(0, 1, 2, 3, 4, 5, 6, 7, 8)],
+    },
+    (4, 4): {
+        '5-5-5': [(0, 1, 4, 5, 8), (2, 3, 6, 7, 11), (9, 10, 12, 13, 14, 15)],
+        '6-6-3': [(0, 1, 4, 5, 8, 9), (2, 3, 6, 7, 10, 11), (12, 13, 14, 15)],
+    },
+}
+
+
+#################################
+# Permutation Ranking
+#################################
+# A placement of k pattern tiles on a board of size cells is a k-permutation of the cells.
+# rank_placement maps it to a unique index in [0, size! / (size - k)!) and unrank_placement
+# maps it back. Digit i is the position of cell i among the cells not used by tiles 0..i-1.
+
+def placement_count(size, k):
+    count = 1
+    for i in range(k):
+        count *= size - i
+    return count
+
+
+def rank_placement(cells, size):
+    rank = 0
+    for i, cell in enumerate(cells):
+        digit = cell
+        for j in range(i):
+            if cells[j] < cell:
+                digit -= 1
+        rank = rank * (size - i) + digit
+    return rank
+
+
+def unrank_placement(rank, k, size):
+    digits = [0] * k
+    for i in range(k - 1, -1, -1):
+        rank, digits[i] = divmod(rank, size - i)
+    free = list(range(size))
+    return [free.pop(digit) for digit in digits]
+
+
+#################################
+# Building
+#################################
+
+# returns the (rows, cols) of a board and its tiles as a flat row-major list
+def _shape_and_tiles(board):
+    return (len(board.matrix), len(board.matrix[0])), board.tiles()
+
+
+# returns neighbors[cell], the cells the blank can slide to from cell
+def _neighbors(rows, cols):
+    neighbors = []
+    for cell in range(rows * cols):
+        r, c = divmod(cell, cols)
+        neighbors.append([nr * cols + nc for nr, nc in ((r, c + 1), (r, c - 1), (r - 1, c), (r + 1, c))
+                          if 0 <= nr < rows and 0 <= nc < cols])
+    return neighbors
+
+
+def build_table(goal_board, pattern):
+    """
+        Runs the retrograde search for one pattern and returns its table as a bytearray.
+
+        Abstract states are (placement of the pattern tiles, blank cell), numbered rank * size + blank.
+        Sliding the blank into a pattern tile costs 1 and any other slide costs 0, so a 0-1 BFS
+        (a deque where free moves go to the front) finds exact abstract distances from the goal.
+        The stored value for a placement is its minimum over all blank cells.
+    """
+    (rows, cols), goal_tiles = _shape_and_tiles(goal_board)
+    size = rows * cols
+    k = len(pattern)
+    if k == 0 or 0 in pattern or len(set(pattern)) != k:
+        raise ValueError("A pattern must be a non-empty set of non-blank tiles")
+    neighbors = _neighbors(rows, cols)
+
+    start_cells = [goal_tiles.index(tile) for tile in pattern]
+    start = rank_placement(start_cells, size) * size + goal_tiles.index(0)
+    distance = bytearray([UNKNOWN]) * (placement_count(size, k) * size)
+    distance[start] = 0
+    fringe = collections.deque([start])
+    while fringe:
+        node = fringe.popleft()
+        cost = distance[node]
+        rank, blank = divmod(node, size)
+        cells = unrank_placement(rank, k, size)
+        for target in neighbors[blank]:
+            if target in cells:
+                moved = cells.copy()
+                moved[cells.index(target)] = blank
+                child = rank_placement(moved, size) * size + target
+                if cost + 1 < distance[child]:
+                    distance[child] = cost + 1
+                    fringe.append(child)
+            else:
+                child = rank * size + target
+                if cost < distance[child]:
+                    distance[child] = cost
+                    fringe.appendleft(child)
+
+    table = bytearray([UNKNOWN]) * placement_count(size, k)
+    for rank in range(len(table)):
+        table[rank] = min(distance[rank * size:(rank + 1) * size])
+    return table
+
+
+def write_table(path, goal_board, pattern, table):
+    """
+        Writes a table next to path and renames it into place, so a process that loads the file
+        never sees a partly written table. Layout: MAGIC, rows, cols, k, the k pattern tiles,
+        the size goal tiles, then one byte per placement rank.
+    """
+    (rows, cols), goal_tiles = _shape_and_tiles(goal_board)
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, rows, cols, len(pattern)))
+        f.write(bytes(pattern))
+        f.write(bytes(goal_tiles))
+        f.write(table)
+    os.replace(temp_path, path)
+
+
+##################################
+# PatternDatabase Class
+##################################
+
+
+class PatternDatabase:
+    """
+        One memory-mapped pattern database
+
+        rows, cols - the dimensions of the board the table was built for
+        pattern - the tiles in the pattern, in the order used for ranking
+        goalTiles - the flat goal board the table measures distances to
+        table - a read-only view of the on-disk table, table[rank] = moves for that placement
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.rows, self.cols, k = HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a pattern database")
+        size = self.rows * self.cols
+        offset = HEADER.size
+        self.pattern = tuple(self._map[offset:offset + k])
+        self.goalTiles = list(self._map[offset + k:offset + k + size])
+        self.size = size
+        self.table = memoryview(self._map)[offset + k + size:]
+        if len(self.table) != placement_count(size, k):
+            raise ValueError(f"{path} is truncated")
+
+    # loads the database for pattern from path, building and saving it first if the file is missing
+    @classmethod
+    def load_or_build(cls, path, goal_board, pattern):
+        if not os.path.exists(path):
+            write_table(path, goal_board, pattern, build_table(goal_board, pattern))
+        database = cls(path)
+        if database.goalTiles != goal_board.tiles() or database.pattern != tuple(pattern):
+            raise ValueError(f"{path} was built for a different goal board or pattern")
+        return database
+
+    # returns the stored distance for a board, given where[tile] = the flat cell holding tile
+    def lookup(self, where):
+        size = self.size
+        rank = 0
+        placed = []
+        for i, tile in enumerate(self.pattern):
+            cell = where[tile]
+            digit = cell
+            for other in placed:
+                if other < cell:
+                    digit -= 1
+            placed.append(cell)
+            rank = rank * (size - i) + digit
+        return self.table[rank]
+
+
+##################################
+# AdditivePatternDatabase Class
+##################################
+
+
+class AdditivePatternDatabase:
+    """
+        A heuristic that adds up disjoint pattern databases, usable anywhere a3_PeterManolis
+        accepts a heuristic (e.g. a_star_f_function_factory or a_star_solver)
+
+        goal_board - the board the databases measure distances to
+        databases - one PatternDatabase per pattern
+
+        partitions is either the name of a standard partition in PARTITIONS (e.g. '5-5-5' or '6-6-3'
+        for the 15-puzzle) or a list of tile groups. Missing tables are built into directory and reused
+        by every later instance, including ones in other processes.
+    """
+
+    def __init__(self, goal_board, partitions, directory='.'):
+        self.goal_board = goal_board
+        shape, goal_tiles = _shape_and_tiles(goal_board)
+        if isinstance(partitions, str):
+            if partitions not in PARTITIONS.get(shape, {}):
+                raise ValueError(f"No standard '{partitions}' partition for {shape[0]}x{shape[1]} boards")
+            partitions = [[goal_tiles[cell] for cell in group if goal_tiles[cell] != 0]
+                          for group in PARTITIONS[shape][partitions]]
+        tiles = [tile for pattern in partitions for tile in pattern]
+        if len(tiles) != len(set(tiles)):
+            raise ValueError("Patterns must be disjoint to be added")
+        os.makedirs(directory, exist_ok=True)
+        goal_name = ''.join(format(tile, 'x') for tile in goal_tiles)
+        self.databases = []
+        for pattern in partitions:
+            name = f"pdb_{shape[0]}x{shape[1]}_{goal_name}_{'-'.join(map(str, pattern))}.bin"
+            path = os.path.join(directory, name)
+            self.databases.append(PatternDatabase.load_or_build(path, goal_board, pattern))
+
+    def __call__(self, current_board, goal_board=None):
+        if goal_board is not None and goal_board is not self.goal_board and goal_board != self.goal_board:
+            raise ValueError("AdditivePatternDatabase was built for a different goal board")
+        tiles = current_board.tiles()
+        where = [0] * len(tiles)
+        for idx, val in enumerate(tiles):
+            where[val] = idx
+        return sum(database.lookup(where) for database in self.databases)
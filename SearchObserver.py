@@ -0,0 +1,93 @@
+##################################
+# SearchObserver Class
+##################################
+
+import time
+
+
+class SearchObserver:
+    """
+        Collects statistics from a search in a3_PeterManolis (pass one as observer= to
+        informed_solver or uninformed_solver). Solvers that get no observer skip every hook.
+
+        expansions - States expanded
+        generated - child States created
+        duplicates - States dropped because their board was already explored / visited
+                     (an OpenList's own 'skipped' and 'stale' counts are in openListStats)
+        maxFringe - the largest fringe size seen at an expansion
+        heuristicCalls, heuristicSeconds - calls to (and total time spent in) the f-value function
+        fHistogram - expansions per f-value (per depth for breadth-first search)
+        openListStats - a copy of the fringe's stats when the solver finishes, if it has any
+        sampleEvery, onSample - if both are set, onSample(observer) is called every sampleEvery
+                                expansions, e.g. for live progress reports
+        startTime - when the observer was created (time.perf_counter)
+    """
+
+    def __init__(self, sampleEvery=None, onSample=None):
+        self.expansions = 0
+        self.generated = 0
+        self.duplicates = 0
+        self.maxFringe = 0
+        self.heuristicCalls = 0
+        self.heuristicSeconds = 0.0
+        self.fHistogram = {}
+        self.openListStats = None
+        self.sampleEvery = sampleEvery
+        self.onSample = onSample
+        self.startTime = time.perf_counter()
+
+    # called for every expanded State; value is its f-value (or depth), fringe_size the fringe length
+    def expanded(self, value, fringe_size):
+        self.expansions += 1
+        self.fHistogram[value] = self.fHistogram.get(value, 0) + 1
+        if fringe_size > self.maxFringe:
+            self.maxFringe = fringe_size
+        if self.sampleEvery and self.onSample is not None and self.expansions % self.sampleEvery == 0:
+            self.onSample(self)
+
+    # returns an f-value function that behaves like f_function but counts and times its calls
+    def timed(self, f_function):
+        def f_value(board, depth):
+            started = time.perf_counter()
+            value = f_function(board, depth)
+            self.heuristicSeconds += time.perf_counter() - started
+            self.heuristicCalls += 1
+            return value
+        child_f_value = getattr(f_function, 'child_f_value', None)
+        if child_f_value is not None:
+            def timed_child_f_value(parent_state, board):
+                started = time.perf_counter()
+                value = child_f_value(parent_state, board)
+                self.heuristicSeconds += time.perf_counter() - started
+                self.heuristicCalls += 1
+                return value
+            f_value.child_f_value = timed_child_f_value
+        return f_value
+
+    # called by the solver once the search ends
+    def finished(self, fringe):
+        stats = getattr(fringe, 'stats', None)
+        if stats is not None:
+            self.openListStats = dict(stats)
+
+    # expansions per second since the observer was created
+    def rate(self):
+        elapsed = time.perf_counter() - self.startTime
+        return self.expansions / elapsed if elapsed > 0 else 0.0
+
+    def summary(self):
+        return {
+            'expansions': self.expansions,
+            'generated': self.generated,
+            'duplicates': self.duplicates,
+            'max_fringe': self.maxFringe,
+            'heuristic_calls': self.heuristicCalls,
+            'heuristic_seconds': self.heuristicSeconds,
+            'f_histogram': dict(sorted(self.fHistogram.items())),
+            'open_list_stats': self.openListStats,
+        }
+
+    def __str__(self):
+        return (f'expansions: {self.expansions}, generated: {self.generated}, duplicates: {self.duplicates}, '
+                f'max fringe: {self.maxFringe}, heuristic: {self.heuristicCalls} calls / '
+                f'{self.heuristicSeconds:.3f}s, {self.rate():.0f} expansions/s')
@@ -0,0 +1,176 @@
+##################################
+# SolutionCache Class
+##################################
+# Remembers solved (start, goal) pairs so repeated boards are answered without searching.
+#
+# Pairs are stored under a canonical key, so pairs that are the same puzzle are stored once:
+#   - tiles are relabeled by their goal cell, so only where each tile has to go matters, not its number;
+#     the key also records the goal's blank cell, since the relabeled tiles alone do not say which
+#     one is the blank;
+#   - the diagonal reflection (transpose) of a pair is the same puzzle with every move transposed,
+#     so a pair and its mirror image share the smaller of their two keys (a rows x cols pair and
+#     its cols x rows transpose included).
+# Solutions are stored as blank moves (see Board.slide_blank) in the canonical orientation and
+# transposed back when the key came from the mirror image.
+
+import collections
+import shelve
+
+import Board
+import a3_PeterManolis as a3
+
+MOVES = [(0, 1), (0, -1), (1, 0), (-1, 0)]
+# TRANSPOSED[k] is the index of MOVES[k] reflected across the diagonal
+TRANSPOSED = [2, 3, 0, 1]
+
+
+# returns the canonical key for the pair and whether it was taken from the transposed pair
+def canonical_key(start_board, goal_board):
+    rows, cols = len(start_board.matrix), len(start_board.matrix[0])
+    start_tiles, goal_tiles = start_board.tiles(), goal_board.tiles()
+    target = [0] * len(goal_tiles)
+    for cell, tile in enumerate(goal_tiles):
+        target[tile] = cell
+    # where[cell] = the goal cell of the tile in cell; the goal itself becomes 0, 1, 2, ...
+    where = [target[tile] for tile in start_tiles]
+    blank_r, blank_c = divmod(target[0], cols)
+    mirrored = [0] * len(where)
+    for cell, goal_cell in enumerate(where):
+        r, c = divmod(cell, cols)
+        goal_r, goal_c = divmod(goal_cell, cols)
+        mirrored[c * rows + r] = goal_c * rows + goal_r
+    key = (rows, cols, target[0], where)
+    mirror_key = (cols, rows, blank_c * rows + blank_r, mirrored)
+    transposed = mirror_key < key
+    rows, cols, blank, where = mirror_key if transposed else key
+    return f"{rows}x{cols}:{blank}:{','.join(map(str, where))}", transposed
+
+
+# returns the blank moves that lead from the first State in a solution path to state
+def moves_from_state(state):
+    moves = []
+    path = state.path()
+    for parent, child in zip(path, path[1:]):
+        (r, c), (child_r, child_c) = parent.board.blankPos, child.board.blankPos
+        moves.append((child_r - r, child_c - c))
+    return moves
+
+
+# the solver SolutionCache.solve uses by default
+def _default_solver(start_board, goal_board):
+    return a3.ida_star(start_board, goal_board, a3.LinearConflictHeuristic(goal_board))
+
+
+class SolutionCache:
+    """
+        An LRU cache of solutions, with an optional shelve file behind it
+
+        capacity - the most solutions kept in memory
+        memory - canonical key -> solution (a string of MOVES indices), least recently used first
+        disk - the shelve holding every solution ever stored, or None for a memory-only cache
+        stats - 'hits': lookups answered from memory
+                'disk_hits': lookups answered from the disk tier (and copied into memory)
+                'misses': lookups answered by neither
+                'evictions': solutions dropped from memory to stay within capacity
+
+        Can be used as a context manager, which closes the disk tier on exit.
+    """
+
+    def __init__(self, capacity=1024, path=None):
+        if capacity < 1:
+            raise ValueError("SolutionCache needs room for at least one solution")
+        self.capacity = capacity
+        self.memory = collections.OrderedDict()
+        self.disk = shelve.open(path) if path is not None else None
+        self.stats = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0}
+
+    def __len__(self):
+        return len(self.memory)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if self.disk is not None:
+            self.disk.close()
+            self.disk = None
+
+    def _remember(self, key, solution):
+        self.memory[key] = solution
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.capacity:
+            self.memory.popitem(last=False)
+            self.stats['evictions'] += 1
+
+    # returns the stored solution for the pair as a list of moves, or None if it is not stored
+    def get(self, start_board, goal_board):
+        key, transposed = canonical_key(start_board, goal_board)
+        solution = self.memory.get(key)
+        if solution is not None:
+            self.memory.move_to_end(key)
+            self.stats['hits'] += 1
+        elif self.disk is not None and key in self.disk:
+            solution = self.disk[key]
+            self._remember(key, solution)
+            self.stats['disk_hits'] += 1
+        else:
+            self.stats['misses'] += 1
+            return None
+        if transposed:
+            return [MOVES[TRANSPOSED[int(k)]] for k in solution]
+        return [MOVES[int(k)] for k in solution]
+
+    # stores moves (a list of blank moves) as the solution for the pair
+    def put(self, start_board, goal_board, moves):
+        key, transposed = canonical_key(start_board, goal_board)
+        indices = [MOVES.index(tuple(move)) for move in moves]
+        solution = ''.join(str(TRANSPOSED[k] if transposed else k) for k in indices)
+        self._remember(key, solution)
+        if self.disk is not None:
+            self.disk[key] = solution
+
+    def solve(self, start_board, goal_board, solver=None):
+        """
+            Returns a list of moves from start_board to goal_board, from the cache when possible.
+            On a miss, solver(start_board, goal_board) is called and must return a list of moves or
+            a Goal State (as ida_star and a_star_solver do); the default is ida_star with
+            LinearConflictHeuristic. Boards that cannot reach the goal return None and are not cached.
+        """
+        if not start_board.is_solvable(goal_board):
+            return None
+        moves = self.get(start_board, goal_board)
+        if moves is not None:
+            return moves
+        found = (solver or _default_solver)(start_board, goal_board)
+        if found is None:
+            return None
+        moves = found if isinstance(found, list) else moves_from_state(found)
+        self.put(start_board, goal_board, moves)
+        return moves
+
+
+def main():
+    # Each pair below relabels to the same tiles and differs only in where the goal's blank is,
+    # so a key without the blank would hand the first puzzle's moves to the second
+    colliding_pairs = [
+        [(Board.Board([[0, 2, 3], [4, 1, 6], [7, 8, 5]]), Board.Board([[1, 2, 3], [4, 5, 6], [7, 8, 0]])),
+         (Board.Board([[8, 1, 2], [3, 0, 5], [6, 7, 4]]), Board.Board([[0, 1, 2], [3, 4, 5], [6, 7, 8]]))],
+        [(Board.Board([[1, 0, 3], [4, 2, 5]]), Board.Board([[1, 2, 3], [4, 5, 0]])),
+         (Board.Board([[0, 5, 2], [3, 1, 4]]), Board.Board([[0, 1, 2], [3, 4, 5]]))],
+    ]
+    cache = SolutionCache()
+    for pairs in colliding_pairs:
+        assert canonical_key(*pairs[0]) != canonical_key(*pairs[1])
+        for start_board, goal_board in pairs:
+            board = start_board
+            for move in cache.solve(start_board, goal_board):
+                board = board.slide_blank(move)
+                assert board is not None
+            assert board == goal_board
+
+
+if __name__ == "__main__":
+    main()
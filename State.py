@@ -12,14 +12,19 @@ class State:
         depth - the depth in the move tree from the original board that this board
                 can be found in (the # of moves the puzzle has undergone)
         f-value - the priority order of the state; some evaluation function of the state
+        h - the heuristic value of the board, if the search that made this State kept it (else None)
     """
 
+    # States are created for every generated board, so they have no per-instance __dict__
+    __slots__ = ('board', 'parent_state', 'depth', 'fvalue', 'h')
+
     # The representation of the current game state
-    def __init__(self, board, parent_state, depth, fvalue=0):
+    def __init__(self, board, parent_state, depth, fvalue=0, h=None):
         self.board = board
         self.parent_state = parent_state
         self.depth = depth
         self.fvalue = fvalue
+        self.h = h
 
     # checks if the f-value of this board is less than the f-value of another board
     def __lt__(self, other):
@@ -30,13 +35,17 @@ class State:
         return f"{self.board}\nf-value: {self.fvalue}\nsteps: {self.depth}\n"
 
     # a function to explain how the state is made
+    # (built from the root outwards, so long parent chains do not recurse)
     def __repr__(self):
         if self.parent_state is self:
             return f'State({self.board!r}, "is own parent", {self.depth!r}, {self.fvalue!r})'
-        try:
-            return f'State({self.board!r}, {self.parent_state!r}, {self.depth!r}, {self.fvalue!r})'
-        except RecursionError:
-            return 'State("could not be represented due to RecursionError")'
+        chain = self._chain()
+        if chain is None:
+            return 'State("could not be represented due to a cycle in its parent states")'
+        s = 'None'
+        for state in reversed(chain):
+            s = f'State({state.board!r}, {s}, {state.depth!r}, {state.fvalue!r})'
+        return s
 
     # checks if two States are the same. This only compares the boards.
     def __eq__(self, other):
@@ -44,8 +53,28 @@ class State:
             return False
         return self.board == other.board
 
+    # returns the list of States from this one up to the root, or None if the parents loop
+    def _chain(self):
+        chain = []
+        seen = set()
+        state = self
+        while state is not None:
+            if id(state) in seen:
+                return None
+            seen.add(id(state))
+            chain.append(state)
+            state = state.parent_state
+        return chain
+
+    # returns the list of States from the initial state to this one
+    def path(self):
+        chain = self._chain()
+        if chain is None:
+            raise ValueError("State has a cycle in its parent states")
+        chain.reverse()
+        return chain
+
     # Function to print a completed path from the initial state to the solution state #
     def printPath(self):
-        print(self.board)
-        if self.parent_state is not None:
-            self.parent_state.printPath()
+        for state in reversed(self.path()):
+            print(state.board)
@@ -0,0 +1,128 @@
+##################################
+# StateArena Class
+##################################
+# A memory-lean alternative to a tree of State objects, used by compact_informed_solver in
+# a3_PeterManolis.
+
+import array
+import tracemalloc
+
+import Board
+import State
+
+
+class StateArena:
+    """
+        A compact store for search nodes, kept as parallel arrays instead of one State per node
+
+        boards - the packed state of each node's board (see Board.PackedBoard)
+        blanks - the flat index of the blank in each node's board
+        parents - the index of each node's parent, or -1 for the root
+        depths - the depth of each node
+        fvalues - the f-value of each node
+        hvalues - the heuristic value of each node, where the search keeps it (0 otherwise)
+
+        A node is just its index, so a node costs about 21 bytes here instead of a State,
+        a board object and its ints. Packed states must fit in 64 bits (see fits), which holds
+        for boards of up to 16 cells.
+    """
+
+    # whether packed boards with the given geometry fit in boards
+    @staticmethod
+    def fits(geometry):
+        return geometry.rows * geometry.cols * geometry.bits <= 64
+
+    def __init__(self):
+        self.boards = array.array('Q')
+        self.blanks = array.array('B')
+        self.parents = array.array('i')
+        self.depths = array.array('H')
+        self.fvalues = array.array('f')
+        self.hvalues = array.array('H')
+
+    def __len__(self):
+        return len(self.boards)
+
+    # stores a node and returns its index
+    def add(self, board, parent, depth, fvalue=0, h=0):
+        if not self.fits(board.geometry):
+            raise ValueError(f"StateArena only holds boards that pack into 64 bits, not "
+                             f"{board.geometry.rows}x{board.geometry.cols} boards")
+        self.boards.append(board.state)
+        self.blanks.append(board.blankIdx)
+        self.parents.append(parent)
+        self.depths.append(depth)
+        self.fvalues.append(fvalue)
+        self.hvalues.append(h)
+        return len(self.boards) - 1
+
+    # returns the indices of the nodes from the root to the given node
+    def path(self, index):
+        indices = []
+        while index != -1:
+            indices.append(index)
+            index = self.parents[index]
+        indices.reverse()
+        return indices
+
+    # returns the PackedBoard of the given node, for boards with the given geometry
+    def board(self, index, geometry):
+        return Board.PackedBoard.from_state(self.boards[index], self.blanks[index], geometry)
+
+    # rebuilds the given node as a regular State chain, for boards with the given geometry
+    def to_state(self, index, geometry):
+        state = None
+        for i in self.path(index):
+            state = State.State(self.board(i, geometry), state, self.depths[i], self.fvalues[i])
+        return state
+
+
+# Measures the memory each representation needs per search node by creating count nodes
+# of each kind under tracemalloc, and returns a dict of bytes per node.
+def node_memory_report(count=100000):
+    start = Board.Board([[1, 2, 3, 4], [5, 6, 7, 8], [9, 10, 11, 12], [13, 14, 15, 0]])
+    packed = start.pack()
+
+    def measure(make):
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        nodes = make()
+        used = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        del nodes
+        return used / count
+
+    def states_with_boards():
+        parent = None
+        nodes = []
+        for depth in range(count):
+            parent = State.State(start.duplicate(), parent, depth, depth)
+            nodes.append(parent)
+        return nodes
+
+    def states_with_packed_boards():
+        parent = None
+        nodes = []
+        for depth in range(count):
+            board = Board.PackedBoard.from_state(packed.state + depth, packed.blankIdx, packed.geometry)
+            parent = State.State(board, parent, depth, depth)
+            nodes.append(parent)
+        return nodes
+
+    def arena_nodes():
+        arena = StateArena()
+        for depth in range(count):
+            board = Board.PackedBoard.from_state(packed.state + depth, packed.blankIdx, packed.geometry)
+            arena.add(board, depth - 1, depth % 65536, depth)
+        return arena
+
+    return {
+        'State + Board': measure(states_with_boards),
+        'State + PackedBoard': measure(states_with_packed_boards),
+        'StateArena': measure(arena_nodes),
+    }
+
+
+if __name__ == "__main__":
+    for name, size in node_memory_report().items():
+        print(f'{name}: {size:.1f} bytes per node')
@@ -10,57 +10,83 @@ class Board():
     ##########################################
     ####   Constructor
     ##########################################
-    def __init__(self, filename):
+    # pass either the name of a csv file or its rows (see loadRows)
+    def __init__(self, filename=None, rows=None):
 
         # initialize all of the variables
         self.n2 = 0
         self.n = 0
         self.spaces = 0
         self.board = None
+        self.full = 0
         self.valsInRows = None
         self.valsInCols = None
         self.valsInBoxes = None
         self.unsolvedSpaces = None
 
+        self.peers = None
+        self.units = None
+        self.candidateCounts = None
+        self.spacesByCount = None
+        self.minCount = 0
+        self.eliminated = None
+        self.trail = []
+
         # load the file and initialize the in-memory board with the data
-        self.loadSudoku(filename)
+        if rows is not None:
+            self.loadRows(rows)
+        else:
+            self.loadSudoku(filename)
+        self.buildCandidateIndex()
 
 
     # loads the sudoku board from the given file
     def loadSudoku(self, filename):
 
         with open(filename) as csvFile:
-            self.n = -1
-            reader = csv.reader(csvFile)
-            for row in reader:
-
-                # Assign the n value and construct the approriately sized dependent data
-                if self.n == -1:
-                    self.n = int(len(row) ** (1/2))
-                    if not self.n ** 2 == len(row):
-                        raise Exception('Each row must have n^2 values! (See row 0)')
-                    else:
-                        self.n2 = len(row)
-                        self.spaces = self.n ** 4
-                        self.board = {}
-                        self.valsInRows = [set() for _ in range(self.n2)]
-                        self.valsInCols = [set() for _ in range(self.n2)]
-                        self.valsInBoxes = [set() for _ in range(self.n2)]
-                        self.unsolvedSpaces = set(itertools.product(range(self.n2), range(self.n2)))
-
-                # check if each row has the correct number of values
+            self.loadRows(csv.reader(csvFile))
+
+    # loads the sudoku board from rows of strings (one per space, '' for an empty space),
+    # as read from a csv file
+    # valsInRows, valsInCols and valsInBoxes hold one bitmask per row, col, and box:
+    # bit (value - 1) is set when the value is used there, and full has all n2 bits set
+    def loadRows(self, rows):
+        self.n = -1
+        for rowIndex, row in enumerate(rows):
+
+            # Assign the n value and construct the approriately sized dependent data
+            if self.n == -1:
+                self.n = int(len(row) ** (1/2))
+                if not self.n ** 2 == len(row):
+                    raise Exception('Each row must have n^2 values! (See row 0)')
                 else:
-                    if len(row) != self.n2:
-                        raise Exception('Each row must have the same number of values. (See row ' + str(reader.line_num - 1) + ')')
-
-                # add each value to the correct place in the board; record that the row, col, and box contains value
-                for index, item in enumerate(row):
-                    if not item == '':
-                        self.board[(reader.line_num-1, index)] = int(item)
-                        self.valsInRows[reader.line_num-1].add(int(item))
-                        self.valsInCols[index].add(int(item))
-                        self.valsInBoxes[self.spaceToBox(reader.line_num-1, index)].add(int(item))
-                        self.unsolvedSpaces.remove((reader.line_num-1, index))
+                    self.n2 = len(row)
+                    self.spaces = self.n ** 4
+                    self.board = {}
+                    self.full = (1 << self.n2) - 1
+                    self.valsInRows = [0] * self.n2
+                    self.valsInCols = [0] * self.n2
+                    self.valsInBoxes = [0] * self.n2
+                    self.unsolvedSpaces = set(itertools.product(range(self.n2), range(self.n2)))
+
+            # check if each row has the correct number of values
+            else:
+                if len(row) != self.n2:
+                    raise Exception('Each row must have the same number of values. (See row ' + str(rowIndex) + ')')
+
+            # add each value to the correct place in the board; record that the row, col, and box contains value
+            # (a value given twice in a row, col, or box is rejected here rather than left for the search)
+            for index, item in enumerate(row):
+                if not item == '':
+                    bit = 1 << (int(item) - 1)
+                    box = self.spaceToBox(rowIndex, index)
+                    if (self.valsInRows[rowIndex] | self.valsInCols[index] | self.valsInBoxes[box]) & bit:
+                        raise ValueError(f'{item} at ({rowIndex}, {index}) repeats a value in its row, col, or box')
+                    self.board[(rowIndex, index)] = int(item)
+                    self.valsInRows[rowIndex] |= bit
+                    self.valsInCols[index] |= bit
+                    self.valsInBoxes[box] |= bit
+                    self.unsolvedSpaces.remove((rowIndex, index))
 
 
     ##########################################
@@ -71,6 +97,12 @@ class Board():
     def spaceToBox(self, row, col):
         return self.n * (row // self.n) + col // self.n
 
+    # returns the bitmask of values that can still go in the space (bit value - 1 for each);
+    # values ruled out by propagation (see eliminate) are not candidates either
+    def candidates(self, space):
+        used = self.valsInRows[space[0]] | self.valsInCols[space[1]] | self.valsInBoxes[self.spaceToBox(space[0], space[1])]
+        return ~(used | self.eliminated[space]) & self.full
+
     # prints out a command line representation of the board
     def print(self):
         for r in range(self.n2):
@@ -111,64 +143,389 @@ class Board():
     ##########################################
 
     # makes a move, records it in its row, col, and box, and removes the space from unsolvedSpaces
+    # (every unsolved peer that could still take value loses it as a candidate in the index)
     def makeMove(self, space, value):
+        bit = 1 << (value - 1)
+        for peer in self.peers[space]:
+            if peer in self.candidateCounts and self.candidates(peer) & bit:
+                self.changeCandidateCount(peer, -1)
+
         self.board[space] = value
 
-        self.valsInRows[space[0]].add(value)
-        self.valsInCols[space[1]].add(value)
-        self.valsInBoxes[self.spaceToBox(space[0], space[1])].add(value)
+        self.valsInRows[space[0]] |= bit
+        self.valsInCols[space[1]] |= bit
+        self.valsInBoxes[self.spaceToBox(space[0], space[1])] |= bit
 
         self.unsolvedSpaces.remove(space)
+        self.spacesByCount[self.candidateCounts.pop(space)].remove(space)
 
     # removes the move, its record in its row, col, and box, and adds the space back to unsolvedSpaces
+    # (every unsolved peer that can take value again gets it back as a candidate in the index)
     def undoMove(self, space, value):
         self.board[space] = None
 
-        self.valsInRows[space[0]].remove(value)
-        self.valsInCols[space[1]].remove(value)
-        self.valsInBoxes[self.spaceToBox(space[0],space[1])].remove(value)
-       
+        bit = 1 << (value - 1)
+        self.valsInRows[space[0]] &= ~bit
+        self.valsInCols[space[1]] &= ~bit
+        self.valsInBoxes[self.spaceToBox(space[0],space[1])] &= ~bit
+
         self.unsolvedSpaces.add(space)
+        for peer in self.peers[space]:
+            if peer in self.candidateCounts and self.candidates(peer) & bit:
+                self.changeCandidateCount(peer, 1)
+        self.addToCandidateIndex(space)
 
     # returns True if the space is empty and on the board,
     # and assigning value to it if not blocked by any constraints
     def isValidMove(self, space, value):
         if space not in self.unsolvedSpaces:
             return False
-        if value  in self.valsInRows[space[0]] or value in self.valsInCols[space[1]] or value in self.valsInBoxes[self.spaceToBox(space[0],space[1])]:
-            return False
-        return True
-                
+        return bool(self.candidates(space) >> (value - 1) & 1)
+
+
+    ##########################################
+    ####   Most Constrained Space Index
+    ##########################################
+    # candidateCounts maps each unsolved space to how many values it can still take, and
+    # spacesByCount[k] is the set of unsolved spaces with exactly k candidates. makeMove and
+    # undoMove keep both up to date by visiting only the peers of the changed space.
+
+    # builds peers (the other spaces sharing a row, col, or box with each space) and the index
+    def buildCandidateIndex(self):
+        rowSpaces = [[] for _ in range(self.n2)]
+        colSpaces = [[] for _ in range(self.n2)]
+        boxSpaces = [[] for _ in range(self.n2)]
+        for row, col in itertools.product(range(self.n2), range(self.n2)):
+            rowSpaces[row].append((row, col))
+            colSpaces[col].append((row, col))
+            boxSpaces[self.spaceToBox(row, col)].append((row, col))
+        self.peers = {}
+        for row, col in itertools.product(range(self.n2), range(self.n2)):
+            peers = set(rowSpaces[row]) | set(colSpaces[col]) | set(boxSpaces[self.spaceToBox(row, col)])
+            peers.discard((row, col))
+            self.peers[(row, col)] = tuple(peers)
+        # each unit is (the list holding its bitmask, its index in that list, its spaces)
+        self.units = ([(self.valsInRows, i, spaces) for i, spaces in enumerate(rowSpaces)] +
+                      [(self.valsInCols, i, spaces) for i, spaces in enumerate(colSpaces)] +
+                      [(self.valsInBoxes, i, spaces) for i, spaces in enumerate(boxSpaces)])
+
+        self.eliminated = dict.fromkeys(self.peers, 0)
+        self.candidateCounts = {}
+        self.spacesByCount = [set() for _ in range(self.n2 + 1)]
+        self.minCount = 0
+        for space in self.unsolvedSpaces:
+            self.addToCandidateIndex(space)
+
+    def addToCandidateIndex(self, space):
+        count = self.candidates(space).bit_count()
+        self.candidateCounts[space] = count
+        self.spacesByCount[count].add(space)
+        if count < self.minCount:
+            self.minCount = count
+
+    def changeCandidateCount(self, space, change):
+        count = self.candidateCounts[space]
+        self.spacesByCount[count].remove(space)
+        count += change
+        self.candidateCounts[space] = count
+        self.spacesByCount[count].add(space)
+        if count < self.minCount:
+            self.minCount = count
+
+    # returns True if some unsolved space has no values left, so the board cannot be completed
+    def isDeadEnd(self):
+        return len(self.spacesByCount[0]) > 0
 
     # optional helper function for use by getMostConstrainedUnsolvedSpace
+    # returns the number of different values already used in the space's row, col, and box
     def evaluateSpace(self, space):
-        rowConstrants = len(self.valsInRows[space[0]])
-        colConstraits = len(self.valsInCols[space[1]])
-        boxConstraints = len(self.valsInBoxes[self.spaceToBox(space[0],space[1])])
-        sum = rowConstrants + colConstraits + boxConstraints
-        return sum
-    # gets the unsolved space with the most current constraints
+        used = self.valsInRows[space[0]] | self.valsInCols[space[1]] | self.valsInBoxes[self.spaceToBox(space[0],space[1])]
+        return used.bit_count()
+
+    # gets the unsolved space with the most current constraints (the fewest candidates left)
     # returns None if unsolvedSpaces is empty
     def getMostConstrainedUnsolvedSpace(self):
         if len(self.unsolvedSpaces) == 0:
             return None
-        max = 0    
-        for space in self.unsolvedSpaces:
-            temp = self.evaluateSpace(space)
-            if temp > max:
-                max = temp
-                mostConsatrints = space
+        # minCount only ever moves down in makeMove/undoMove, so this scan is amortized O(1)
+        while not self.spacesByCount[self.minCount]:
+            self.minCount += 1
+        return next(iter(self.spacesByCount[self.minCount]))
+
+
+    ##########################################
+    ####   Propagation
+    ##########################################
+    # Every assignment and elimination made through assign and eliminate is recorded on the trail,
+    # so undoToCheckpoint can take back everything done since checkpoint() in one call,
+    # however many moves propagation implied.
+
+    # returns a marker for the current state of the trail
+    def checkpoint(self):
+        return len(self.trail)
+
+    # makes a move and records it on the trail
+    def assign(self, space, value):
+        self.makeMove(space, value)
+        self.trail.append((space, value, 0))
+
+    # rules out the values in bits for an unsolved space, recording it on the trail;
+    # returns True if any of them were still candidates
+    def eliminate(self, space, bits):
+        bits &= self.candidates(space)
+        if not bits:
+            return False
+        self.eliminated[space] |= bits
+        self.changeCandidateCount(space, -bits.bit_count())
+        self.trail.append((space, 0, bits))
+        return True
 
-        return mostConsatrints
+    # undoes every assignment and elimination made since the checkpoint, newest first
+    def undoToCheckpoint(self, checkpoint):
+        while len(self.trail) > checkpoint:
+            space, value, bits = self.trail.pop()
+            if value:
+                self.undoMove(space, value)
+            else:
+                self.eliminated[space] &= ~bits
+                self.changeCandidateCount(space, bits.bit_count())
+
+    # assigns every space that has a single candidate (naked singles) and every value that fits
+    # in only one space of a row, col, or box (hidden singles) until nothing changes; with pairs,
+    # also eliminates by naked pairs and pointing pairs when the singles run out.
+    # returns False as soon as the board is found to be unsolvable (the caller undoes the trail)
+    def propagate(self, pairs=False):
+        while True:
+            if self.isDeadEnd():
+                return False
+            if self.spacesByCount[1]:
+                space = next(iter(self.spacesByCount[1]))
+                self.assign(space, self.candidates(space).bit_length())
+                continue
+            found = self.findHiddenSingles()
+            if found is None:
+                return False
+            if found:
+                continue
+            if not pairs or not (self.eliminateNakedPairs() or self.eliminatePointingPairs()):
+                return True
+
+    # assigns the hidden singles of every unit; returns how many were assigned,
+    # or None if some value has no space left in a unit
+    def findHiddenSingles(self):
+        assigned = 0
+        for masks, index, spaces in self.units:
+            once = 0
+            twice = 0
+            for space in spaces:
+                if space in self.candidateCounts:
+                    options = self.candidates(space)
+                    twice |= once & options
+                    once |= options
+            if ~(masks[index] | once) & self.full:
+                return None
+            singles = once & ~twice
+            while singles:
+                bit = singles & -singles
+                singles ^= bit
+                for space in spaces:
+                    if space in self.candidateCounts and self.candidates(space) & bit:
+                        self.assign(space, bit.bit_length())
+                        assigned += 1
+                        break
+        return assigned
+
+    # when two spaces in a unit have the same two candidates, no other space in the unit can take them;
+    # returns True if anything was eliminated
+    def eliminateNakedPairs(self):
+        changed = False
+        for masks, index, spaces in self.units:
+            seen = {}
+            for space in spaces:
+                if self.candidateCounts.get(space) == 2:
+                    options = self.candidates(space)
+                    if options in seen:
+                        for other in spaces:
+                            if other != space and other != seen[options] and other in self.candidateCounts:
+                                changed |= self.eliminate(other, options)
+                    else:
+                        seen[options] = space
+        return changed
+
+    # when every space that can take a value in a box lies in one row (or col), no space of that
+    # row (or col) outside the box can take it; returns True if anything was eliminated
+    def eliminatePointingPairs(self):
+        changed = False
+        for masks, box, spaces in self.units[2 * self.n2:]:
+            missing = ~masks[box] & self.full
+            while missing:
+                bit = missing & -missing
+                missing ^= bit
+                rows = set()
+                cols = set()
+                for space in spaces:
+                    if space in self.candidateCounts and self.candidates(space) & bit:
+                        rows.add(space[0])
+                        cols.add(space[1])
+                if len(rows) == 1:
+                    _, _, line = self.units[rows.pop()]
+                elif len(cols) == 1:
+                    _, _, line = self.units[self.n2 + cols.pop()]
+                else:
+                    continue
+                for space in line:
+                    if space in self.candidateCounts and self.spaceToBox(space[0], space[1]) != box:
+                        changed |= self.eliminate(space, bit)
+        return changed
         
         
 
+class DancingLinks:
+    ##########################################
+    ####   Exact Cover (Knuth's Algorithm X with Dancing Links)
+    ##########################################
+    # The board as an exact cover problem: one column per constraint (each space filled once, and
+    # each value once per row, col, and box; 4 * n2^2 columns) and one row per possible
+    # (space, value) placement. Givens get only their own placement; empty spaces get their candidates.
+    #
+    # The links live in flat lists indexed by node number instead of one object per node:
+    # node 0 is the root, nodes 1..columns are the column headers, and the rest are the 1s of the
+    # matrix, four per placement. left/right/up/down are the circular links, column[node] is the
+    # node's column header, size[header] counts the nodes in a column, and placement[node] is the
+    # (space, value) that node belongs to.
+
+    def __init__(self, board):
+        self.n2 = board.n2
+        cells = board.n2 * board.n2
+        columns = 4 * cells
+        self.left = [columns] + list(range(columns))
+        self.right = list(range(1, columns + 1)) + [0]
+        self.up = list(range(columns + 1))
+        self.down = list(range(columns + 1))
+        self.column = list(range(columns + 1))
+        self.size = [0] * (columns + 1)
+        self.placement = [None] * (columns + 1)
+        self.guesses = 0
+
+        for row, col in itertools.product(range(board.n2), range(board.n2)):
+            space = (row, col)
+            if space in board.unsolvedSpaces:
+                options = board.candidates(space)
+                values = []
+                while options:
+                    bit = options & -options
+                    options ^= bit
+                    values.append(bit.bit_length())
+            else:
+                values = [board.board[space]]
+            box = board.spaceToBox(row, col)
+            for value in values:
+                self.addPlacement(space, value, [1 + row * board.n2 + col,
+                                                 1 + cells + row * board.n2 + value - 1,
+                                                 1 + 2 * cells + col * board.n2 + value - 1,
+                                                 1 + 3 * cells + box * board.n2 + value - 1])
+
+    # adds one matrix row with a 1 in each of the given columns
+    def addPlacement(self, space, value, headers):
+        first = len(self.column)
+        for i, header in enumerate(headers):
+            node = first + i
+            self.left.append(first + (i - 1) % len(headers))
+            self.right.append(first + (i + 1) % len(headers))
+            self.up.append(self.up[header])
+            self.down.append(header)
+            self.down[self.up[header]] = node
+            self.up[header] = node
+            self.column.append(header)
+            self.placement.append((space, value))
+            self.size[header] += 1
+
+    # removes a column from the header list and every row that has a 1 in it from the other columns
+    def cover(self, header):
+        left, right, up, down, column, size = self.left, self.right, self.up, self.down, self.column, self.size
+        right[left[header]] = right[header]
+        left[right[header]] = left[header]
+        i = down[header]
+        while i != header:
+            j = right[i]
+            while j != i:
+                down[up[j]] = down[j]
+                up[down[j]] = up[j]
+                size[column[j]] -= 1
+                j = right[j]
+            i = down[i]
+
+    # exactly reverses cover(header)
+    def uncover(self, header):
+        left, right, up, down, column, size = self.left, self.right, self.up, self.down, self.column, self.size
+        i = up[header]
+        while i != header:
+            j = left[i]
+            while j != i:
+                size[column[j]] += 1
+                down[up[j]] = j
+                up[down[j]] = j
+                j = left[j]
+            i = up[i]
+        right[left[header]] = header
+        left[right[header]] = header
+
+    # Algorithm X: covers the column with the fewest rows left and tries each of its rows;
+    # leaves the chosen placements in solution and returns True once every column is covered
+    def search(self, solution):
+        right = self.right
+        if right[0] == 0:
+            return True
+        header = right[0]
+        i = right[header]
+        while i != 0:
+            if self.size[i] < self.size[header]:
+                header = i
+            i = right[i]
+        if self.size[header] == 0:
+            return False
+
+        self.cover(header)
+        i = self.down[header]
+        while i != header:
+            self.guesses += 1
+            solution.append(self.placement[i])
+            j = right[i]
+            while j != i:
+                self.cover(self.column[j])
+                j = right[j]
+            if self.search(solution):
+                return True
+            j = self.left[i]
+            while j != i:
+                self.uncover(self.column[j])
+                j = self.left[j]
+            solution.pop()
+            i = self.down[i]
+        self.uncover(header)
+        return False
+
+    # returns the solved board in the same {(row, col): value} form as Board.board, or None
+    def solve(self):
+        solution = []
+        if not self.search(solution):
+            return None
+        return dict(solution)
+
+
 class Solver:
     ##########################################
     ####   Constructor
     ##########################################
-    def __init__(self):
-        pass
+    # propagate - run Board.propagate at every node before branching
+    # pairs - also use naked pairs and pointing pairs while propagating
+    # dlx - solve with DancingLinks (exact cover) instead of backtracking search
+    # guesses - how many values were tried by branching (rather than deduced) in the last solve
+    def __init__(self, propagate=True, pairs=False, dlx=False):
+        self.propagate = propagate
+        self.pairs = pairs
+        self.dlx = dlx
+        self.guesses = 0
 
     ##########################################
     ####   Solver
@@ -182,25 +539,101 @@ class Solver:
 
     # returns True if a solution exists and False if one does not
     def solveBoard(self, board):
+        if self.dlx:
+            return self.solveExactCover(board)
+        self.guesses = 0
+        return self._search(board)
+
+    # the recursive backtracking search behind solveBoard
+    def _search(self, board):
+        start = board.checkpoint()
+        if self.propagate and not board.propagate(self.pairs):
+            board.undoToCheckpoint(start)
+            return False
         if len(board.unsolvedSpaces) == 0:
             return True
-        
+
         space = board.getMostConstrainedUnsolvedSpace()
         if space is None:
             return False
-        
-        for value in range(1, board.n2 + 1):
-            if board.isValidMove(space, value):
-                board.makeMove(space, value)
-                
-                result = self.solveBoard(board)
+
+        # try only the values not already in the space's row, col, or box, lowest first
+        candidates = board.candidates(space)
+        while candidates:
+            bit = candidates & -candidates
+            candidates ^= bit
+            value = bit.bit_length()
+            self.guesses += 1
+            mark = board.checkpoint()
+            board.assign(space, value)
+            if not board.isDeadEnd():
+                result = self._search(board)
                 if result:
                     return True
-                
-                board.undoMove(space, value)
+
+            board.undoToCheckpoint(mark)
+        board.undoToCheckpoint(start)
         return False
+
+    # solves the board with DancingLinks and makes the moves of the solution on it
+    def solveExactCover(self, board):
+        links = DancingLinks(board)
+        solution = links.solve()
+        self.guesses = links.guesses
+        if solution is None:
+            return False
+        for space, value in solution.items():
+            if space in board.unsolvedSpaces:
+                board.assign(space, value)
+        return True
     
+##########################################
+####   Checks
+##########################################
+
+# returns True if every space of board is filled, every row, col, and box holds each value once,
+# and every value given in rows (as passed to Board) is still in place
+def isSolution(board, rows):
+    for row, col in itertools.product(range(board.n2), range(board.n2)):
+        if rows[row][col] != '' and board.board.get((row, col)) != int(rows[row][col]):
+            return False
+    return (not board.unsolvedSpaces and
+            all(vals == board.full for vals in board.valsInRows + board.valsInCols + board.valsInBoxes))
+
+# solves a small puzzle with every Solver mode, then checks that an unsatisfiable version of it
+# is rejected with the board left exactly as it was loaded (so the trail undid every move)
+def runChecks():
+    puzzle = ('53..7....6..195....98....6.8...6...34..8.3..17...2...6'
+              '.6....28....419..5....8..79')
+    rows = [['' if ch == '.' else ch for ch in puzzle[r * 9:(r + 1) * 9]] for r in range(9)]
+    solvers = [Solver(), Solver(pairs=True), Solver(propagate=False), Solver(dlx=True)]
+    for solver in solvers:
+        board = Board(rows=rows)
+        assert solver.solveBoard(board)
+        assert isSolution(board, rows)
+
+    # 1 fits the row, col, and box of space (0, 2), but the only solution has 4 there
+    # (undoMove leaves None in board for a space it empties, so only filled spaces are compared)
+    rows[0][2] = '1'
+    for solver in solvers:
+        board = Board(rows=rows)
+        filled = lambda: {space: value for space, value in board.board.items() if value is not None}
+        before = (list(board.valsInRows), dict(board.candidateCounts), dict(board.eliminated), filled())
+        assert not solver.solveBoard(board)
+        assert (board.valsInRows, board.candidateCounts, board.eliminated, filled()) == before
+        assert not board.trail
+
+    # a given that repeats a value in its row is rejected when the board is loaded
+    rows[0][2] = '5'
+    try:
+        Board(rows=rows)
+        assert False
+    except ValueError:
+        pass
+
 if __name__ == "__main__":
+    runChecks()
+
     # change this to the input file that you'd like to test
     board = Board('tests/test-1-easy/03.csv')
     s = Solver()
@@ -10,13 +10,28 @@
 ###################################
 
 import State
+import StateArena
 import Board
+import OpenList
+import collections
+import functools
 import heapq
+import time
 
 STOP = -1
 CONTINUE = 0
 
 
+# Converts the start and goal boards into PackedBoards so the search hashes, compares
+# and slides single ints instead of copying matrices. Boards that are already packed are kept.
+def pack_boards(start_board, goal_board):
+    if not isinstance(start_board, Board.PackedBoard):
+        start_board = start_board.pack()
+    if not isinstance(goal_board, Board.PackedBoard):
+        goal_board = goal_board.pack()
+    return start_board, goal_board
+
+
 #################################
 # Problem 1 - Fringe Expansion
 #################################
@@ -28,13 +43,24 @@ CONTINUE = 0
 # (1) This function should not return or yield anything but just update the contents of the fringe
 # (2) board_object.slide_blank is error-safe. It will return None if it is impossible to slide the blank
 
-def expand_fringe(current_state, fringe):
+# If a visited set is given, boards already in it are skipped and new boards are added to it,
+# so every board enters the fringe at most once.
+# observer is an optional SearchObserver (see SearchObserver.py) that counts the children.
+def expand_fringe(current_state, fringe, visited=None, observer=None):
     childBoard = [(0, 1), (0, -1), (1, 0), (-1, 0)]
     for i in childBoard:
         board = current_state.board.slide_blank(i)
         if board is not None:
+            if visited is not None:
+                if board in visited:
+                    if observer is not None:
+                        observer.duplicates += 1
+                    continue
+                visited.add(board)
             state = State.State(board, current_state, current_state.depth + 1, 0)
             fringe.append(state)
+            if observer is not None:
+                observer.generated += 1
 
 
 ########################################
@@ -46,28 +72,47 @@ def expand_fringe(current_state, fringe):
 #     (Returns STOP if the fringe is empty.)
 #     See the project documentation for more details.
 
-def breadth_first_search(fringe, max_depth, goal_board):
+# The fringe may be a list or a collections.deque; a deque pops from the front in O(1).
+def breadth_first_search(fringe, max_depth, goal_board, visited=None, observer=None):
     if not fringe:
         return STOP
-    state = fringe.pop(0)
+    if isinstance(fringe, collections.deque):
+        state = fringe.popleft()
+    else:
+        state = fringe.pop(0)
     if max_depth < state.depth:
         return CONTINUE
     if goal_board == state.board:
         return state
-    expand_fringe(state,fringe)
+    if observer is not None:
+        observer.expanded(state.depth, len(fringe) + 1)
+    expand_fringe(state, fringe, visited, observer)
     return CONTINUE
 
-def uninformed_solver(start_board, max_depth, goal_board):
+def uninformed_solver(start_board, max_depth, goal_board, packed=False, observer=None, visited=None):
     """
         Looping function which calls breadth_first_search until it finds a solution (a State object) or
         until STOP has been returned. Does not consider States below max_depth.
         If the goal is reached, this function should return the Goal State,
         which includes a path to the goal. Otherwise, returns None.
+        Boards that cannot reach the goal (see Board.is_solvable) return None without searching.
+        If packed is True, the search runs on PackedBoards (See Board.PackedBoard).
+        If an observer (see SearchObserver.py) is given, it records statistics about the search.
+        visited may be any empty set-like container of boards (e.g. a Board.RankBitmap for small boards).
     """
-    fringe = [State.State(start_board, None, 0, 0)]
+    if not start_board.is_solvable(goal_board):
+        return None
+    if packed:
+        start_board, goal_board = pack_boards(start_board, goal_board)
+    fringe = collections.deque([State.State(start_board, None, 0, 0)])
+    if visited is None:
+        visited = set()
+    visited.add(start_board)
     found = CONTINUE
     while found == CONTINUE:
-        found = breadth_first_search(fringe, max_depth, goal_board)
+        found = breadth_first_search(fringe, max_depth, goal_board, visited, observer)
+    if observer is not None:
+        observer.finished(fringe)
     if isinstance(found, State.State):
         # Found goal!
         return found
@@ -75,6 +120,116 @@ def uninformed_solver(start_board, max_depth, goal_board):
     return None
 
 
+def breadth_first_layers(start_board, max_depth=None, visited=None):
+    """
+        Generator that runs BFS one depth at a time, yielding (depth, layer) where layer is the
+        list of States first reached at that depth. Every board appears in exactly one layer.
+        The next layer is only built when the generator is resumed, so a caller can stop early.
+        visited may be any set-like container of boards (it is filled in as the search goes).
+    """
+    if visited is None:
+        visited = set()
+    visited.add(start_board)
+    layer = [State.State(start_board, None, 0, 0)]
+    depth = 0
+    while layer:
+        yield depth, layer
+        if max_depth is not None and depth >= max_depth:
+            return
+        next_layer = []
+        for state in layer:
+            expand_fringe(state, next_layer, visited)
+        layer = next_layer
+        depth += 1
+
+
+def layered_uninformed_solver(start_board, max_depth, goal_board, report=None):
+    """
+        Same result as uninformed_solver, built on breadth_first_layers.
+        If given, report(depth, frontier_size) is called once per layer before it is searched.
+    """
+    if not start_board.is_solvable(goal_board):
+        return None
+    for depth, layer in breadth_first_layers(start_board, max_depth):
+        if report is not None:
+            report(depth, len(layer))
+        for state in layer:
+            if state.board == goal_board:
+                return state
+    return None
+
+
+def bidirectional_solver(start_board, goal_board, max_depth=None, packed=False, stats=None):
+    """
+        Breadth-first search from the start and from the goal at the same time. Each round expands
+        one whole layer of whichever side has the smaller frontier, and every new board is looked up
+        in the other side's table of reached boards. The first layer that meets the other side
+        contains a shortest path, so this explores about 2*b^(d/2) States instead of b^d.
+        Returns the Goal State, whose parent chain leads back to the start (like uninformed_solver),
+        or None if there is no solution within max_depth moves.
+        A caller may pass a stats dict, which is filled with 'expansions' (States expanded, both sides).
+    """
+    if stats is None:
+        stats = {}
+    stats['expansions'] = 0
+    if not start_board.is_solvable(goal_board):
+        return None
+    if packed:
+        start_board, goal_board = pack_boards(start_board, goal_board)
+    if start_board == goal_board:
+        return State.State(start_board, None, 0, 0)
+    childBoard = [(0, 1), (0, -1), (1, 0), (-1, 0)]
+    forward_state = State.State(start_board, None, 0, 0)
+    backward_state = State.State(goal_board, None, 0, 0)
+    # board -> the State that first reached it, for each direction
+    forward = {start_board: forward_state}
+    backward = {goal_board: backward_state}
+    forward_layer, backward_layer = [forward_state], [backward_state]
+    forward_depth = backward_depth = 0
+    while forward_layer and backward_layer:
+        if max_depth is not None and forward_depth + backward_depth >= max_depth:
+            return None
+        expand_forward = len(forward_layer) <= len(backward_layer)
+        if expand_forward:
+            layer, reached, other = forward_layer, forward, backward
+        else:
+            layer, reached, other = backward_layer, backward, forward
+        next_layer = []
+        meeting = None
+        stats['expansions'] += len(layer)
+        for state in layer:
+            for move in childBoard:
+                board = state.board.slide_blank(move)
+                if board is None or board in reached:
+                    continue
+                child = State.State(board, state, state.depth + 1, 0)
+                reached[board] = child
+                next_layer.append(child)
+                match = other.get(board)
+                if match is not None and (meeting is None or match.depth < meeting[1].depth):
+                    meeting = (child, match)
+        if meeting is not None:
+            if expand_forward:
+                return _join_paths(*meeting)
+            return _join_paths(meeting[1], meeting[0])
+        if expand_forward:
+            forward_layer, forward_depth = next_layer, forward_depth + 1
+        else:
+            backward_layer, backward_depth = next_layer, backward_depth + 1
+    return None
+
+
+# Continues the forward path ending at forward_state along the backward path through
+# backward_state (both end on the same board) and returns the resulting Goal State
+def _join_paths(forward_state, backward_state):
+    state = forward_state
+    backward_state = backward_state.parent_state
+    while backward_state is not None:
+        state = State.State(backward_state.board, state, state.depth + 1, 0)
+        backward_state = backward_state.parent_state
+    return state
+
+
 ####################################
 # Problem 3 - UCS f-value Function
 ####################################
@@ -95,9 +250,23 @@ def ucs_f_function(board, current_depth):
 # Notes:
 # (1) It may be helpful to consult your solution for a1.compose here.
 
-def a_star_f_function_factory(heuristic, goal_board):
+# A weight above 1 gives weighted A* (f = depth + weight * heuristic): it expands far fewer States
+# and finds paths at most weight times longer than optimal.
+def a_star_f_function_factory(heuristic, goal_board, weight=1):
     def f_value(board,depth):
-        return depth + heuristic(board,goal_board)
+        return depth + weight * heuristic(board,goal_board)
+    # Incremental heuristics (see ManhattanHeuristic) can score a child from its parent
+    # in O(1); informed_expansion uses child_f_value instead of f_value when it exists.
+    # It returns the child's (f-value, h) so h can be kept on the child State. The parent's h
+    # is taken from parent_state.h, and evaluated in full if the State does not carry one.
+    if hasattr(heuristic, 'update'):
+        def child_f_value(parent_state, board):
+            parent_h = parent_state.h
+            if parent_h is None:
+                parent_h = heuristic(parent_state.board, goal_board)
+            h = heuristic.update(parent_h, parent_state.board, board)
+            return parent_state.depth + 1 + weight * h, h
+        f_value.child_f_value = child_f_value
     return f_value
 
 # Here is an example heuristic function.
@@ -113,6 +282,50 @@ def manhattan_distance(current_board, goal_board):
             total += abs(goal_r - current_r) + abs(goal_c - current_c)
     return total
 
+
+class ManhattanHeuristic:
+    """
+        The manhattan_distance heuristic bound to one goal board, for use with a_star_f_function_factory
+
+        goal_board - the board this heuristic measures distances to
+        distances - distances[tile][idx] is the manhattan distance of tile from its goal cell when it
+                    sits in flat cell idx (always 0 for the blank), built once from the goal positions
+
+        Calling it evaluates a board in O(n^2) with table lookups instead of a find_element scan per tile.
+        update() scores a child from its parent's value in O(1): a slide moves exactly one tile,
+        from the child's blank cell into the parent's blank cell, so only that tile's distance changes.
+        Both give exactly the same values as manhattan_distance.
+    """
+
+    def __init__(self, goal_board):
+        self.goal_board = goal_board
+        cols = len(goal_board.matrix[0])
+        goal_tiles = goal_board.tiles()
+        self.distances = [[0] * len(goal_tiles) for _ in range(max(goal_tiles) + 1)]
+        for goal_idx, val in enumerate(goal_tiles):
+            if val == 0:
+                continue
+            goal_r, goal_c = divmod(goal_idx, cols)
+            for idx in range(len(goal_tiles)):
+                r, c = divmod(idx, cols)
+                self.distances[val][idx] = abs(goal_r - r) + abs(goal_c - c)
+
+    def __call__(self, current_board, goal_board=None):
+        if goal_board is not None and goal_board is not self.goal_board and goal_board != self.goal_board:
+            raise ValueError("ManhattanHeuristic was built for a different goal board")
+        distances = self.distances
+        return sum(distances[val][idx] for idx, val in enumerate(current_board.tiles()))
+
+    # returns the heuristic value of board, given that it is one slide away from parent_board
+    # and that parent_board has the heuristic value parent_h
+    def update(self, parent_h, parent_board, board):
+        moved_to = parent_board.blankIdx
+        return parent_h + self.delta(board.tile(moved_to), board.blankIdx, moved_to)
+
+    # returns the change in the heuristic value when tile slides from cell moved_from to cell moved_to
+    def delta(self, tile, moved_from, moved_to):
+        return self.distances[tile][moved_to] - self.distances[tile][moved_from]
+
 #################################
 # Problem 5 - Your Own Heuristic
 #################################
@@ -128,16 +341,87 @@ def manhattan_distance(current_board, goal_board):
 #     better heuristic.
 
 
+class LinearConflictHeuristic:
+    """
+        Manhattan distance plus linear conflicts, bound to one goal board
+
+        goal_board - the board this heuristic measures distances to
+        goalRow, goalCol - goalRow[tile] / goalCol[tile] is the goal row / column of each tile,
+                           computed once per goal board
+        conflicts - a lookup table from the goal columns (or rows) of the tiles that sit in their goal
+                    row (or column), in board order, to the number of those tiles that have to leave
+                    the line so the rest can pass each other; filled in lazily and shared by all lines
+
+        Two tiles in their goal line but in reversed order need at least two extra moves beyond their
+        manhattan distances. Counting the tiles that must leave each line (the line length minus its
+        longest increasing run of goal positions) keeps this admissible, and the blank is never counted.
+    """
+
+    def __init__(self, goal_board):
+        self.goal_board = goal_board
+        self.rows, self.cols = len(goal_board.matrix), len(goal_board.matrix[0])
+        goal_tiles = goal_board.tiles()
+        self.goalRow = [0] * (max(goal_tiles) + 1)
+        self.goalCol = [0] * (max(goal_tiles) + 1)
+        for idx, val in enumerate(goal_tiles):
+            self.goalRow[val], self.goalCol[val] = divmod(idx, self.cols)
+        self.conflicts = {}
+
+    def __call__(self, current_board, goal_board=None):
+        if goal_board is not None and goal_board is not self.goal_board and goal_board != self.goal_board:
+            raise ValueError("LinearConflictHeuristic was built for a different goal board")
+        goalRow, goalCol, conflicts = self.goalRow, self.goalCol, self.conflicts
+        rows, cols = self.rows, self.cols
+        tiles = current_board.tiles()
+        total = 0
+        extra = 0
+        for r in range(rows):
+            line = []
+            for c in range(cols):
+                val = tiles[r * cols + c]
+                if val == 0:
+                    continue
+                total += abs(goalRow[val] - r) + abs(goalCol[val] - c)
+                if goalRow[val] == r:
+                    line.append(goalCol[val])
+            if len(line) > 1:
+                extra += self._line_conflicts(tuple(line), conflicts)
+        for c in range(cols):
+            line = []
+            for r in range(rows):
+                val = tiles[r * cols + c]
+                if val != 0 and goalCol[val] == c:
+                    line.append(goalRow[val])
+            if len(line) > 1:
+                extra += self._line_conflicts(tuple(line), conflicts)
+        return total + 2 * extra
+
+    # the number of tiles that must leave a line whose tiles have the given goal positions
+    @staticmethod
+    def _line_conflicts(line, conflicts):
+        count = conflicts.get(line)
+        if count is None:
+            longest = [1] * len(line)
+            for i in range(len(line)):
+                for j in range(i):
+                    if line[j] < line[i] and longest[j] + 1 > longest[i]:
+                        longest[i] = longest[j] + 1
+            count = conflicts[line] = len(line) - max(longest)
+        return count
+
+
+# my_heuristic keeps a LinearConflictHeuristic for each of the most recently used goal boards, so
+# the goal index is built once. The key is the goal's shape and tiles rather than the Board itself,
+# since Boards can be changed in place (see Board.move_blank).
+@functools.lru_cache(maxsize=32)
+def _linear_conflict_heuristic(rows, cols, goal_tiles):
+    return LinearConflictHeuristic(Board.Board([list(goal_tiles[r * cols:(r + 1) * cols]) for r in range(rows)]))
+
+
 def my_heuristic(current_board, goal_board):
-    total = 0
-    for i in range(len(current_board.matrix)): 
-        for j in range(len(current_board.matrix[0])): 
-            val = current_board.matrix[i][j]
-            for k in range(len(goal_board.matrix)): 
-                for m in range(len(goal_board.matrix[0])):   
-                    if goal_board.matrix[k][m] == val:
-                        total += abs(k - i) + abs(m - j)
-    return total
+    matrix = goal_board.matrix
+    heuristic = _linear_conflict_heuristic(len(matrix), len(matrix[0]), tuple(goal_board.tiles()))
+    return heuristic(current_board)
 
 #################################
 # Problem 6 - Informed Expansion
@@ -150,13 +434,25 @@ def my_heuristic(current_board, goal_board):
 # (1) This function should update the contents of the fringe using heapq.
 
 
-def informed_expansion(current_state, fringe, f_function):
+# observer is an optional SearchObserver (see SearchObserver.py) that counts the children.
+def informed_expansion(current_state, fringe, f_function, observer=None):
     childBoard = [(0, 1), (0, -1), (1, 0), (-1, 0)]
+    child_f_value = getattr(f_function, 'child_f_value', None)
     for i in childBoard:
         board = current_state.board.slide_blank(i)
         if board:
-            state = State.State(board, current_state, current_state.depth + 1, f_function(board, current_state.depth + 1))
-            heapq.heappush(fringe, state)  
+            h = None
+            if child_f_value is None:
+                fvalue = f_function(board, current_state.depth + 1)
+            else:
+                fvalue, h = child_f_value(current_state, board)
+            state = State.State(board, current_state, current_state.depth + 1, fvalue, h)
+            if isinstance(fringe, list):
+                heapq.heappush(fringe, state)
+            else:
+                fringe.push(state)
+            if observer is not None:
+                observer.generated += 1
 #################################
 # Problem 7 - Informed Search
 #################################
@@ -167,42 +463,376 @@ def informed_expansion(current_state, fringe, f_function):
 #     See the project documentation for more details.
 
 
-def informed_search(fringe, goal_board, f_function, explored):
+# The fringe may be a heapq list or one of the OpenList classes (see OpenList.py)
+def informed_search(fringe, goal_board, f_function, explored, observer=None):
     if not fringe:
         return STOP
-    state = heapq.heappop(fringe)
+    if isinstance(fringe, list):
+        state = heapq.heappop(fringe)
+    else:
+        state = fringe.pop()
+        if state is None:
+            return STOP
     if state.board == goal_board:
         return state         
     if state.board.__hash__() in explored:
+        if observer is not None:
+            observer.duplicates += 1
         return CONTINUE
     explored[state.board.__hash__()] = True
-    informed_expansion(state, fringe, f_function)
+    if observer is not None:
+        observer.expanded(state.fvalue, len(fringe) + 1)
+    informed_expansion(state, fringe, f_function, observer)
     return CONTINUE
 
-def informed_solver(start_board, goal_board, f_function):
+# The fringes informed_solver can use, by name
+OPEN_LISTS = {
+    'heap': list,
+    'best-g': OpenList.BestGOpenList,
+    'bucket': OpenList.BucketOpenList,
+}
+
+
+def informed_solver(start_board, goal_board, f_function, packed=False, explored=None, open_list='heap',
+                    observer=None):
     """
         Looping function which calls informed_search until it finds a solution
         (a State object) or until STOP has been returned.
         If the goal is reached, this function should return the Goal State,
         which includes a path to the goal. Otherwise, returns None.
+        Boards that cannot reach the goal (see Board.is_solvable) return None without searching.
+        If packed is True, the search runs on PackedBoards (See Board.PackedBoard).
+        A caller may pass its own explored dict; afterwards len(explored) is the number of expansions.
+        open_list picks the fringe: a name from OPEN_LISTS, or an (empty) OpenList instance whose
+        stats the caller can read afterwards.
+        If an observer (see SearchObserver.py) is given, it records statistics about the search,
+        including the time spent in f_function.
     """
-    fringe = [State.State(start_board, None, 0, f_function(start_board, 0))]
-    explored = {}
+    if not start_board.is_solvable(goal_board):
+        return None
+    if packed:
+        start_board, goal_board = pack_boards(start_board, goal_board)
+    if observer is not None:
+        f_function = observer.timed(f_function)
+    fringe = OPEN_LISTS[open_list]() if isinstance(open_list, str) else open_list
+    start_state = State.State(start_board, None, 0, f_function(start_board, 0))
+    if isinstance(fringe, list):
+        fringe.append(start_state)
+    else:
+        fringe.push(start_state)
+    if explored is None:
+        explored = {}
     found = CONTINUE
     while found == CONTINUE:
-        found = informed_search(fringe, goal_board, f_function, explored)
+        found = informed_search(fringe, goal_board, f_function, explored, observer)
+    if observer is not None:
+        observer.finished(fringe)
     if isinstance(found, State.State):
         return found
     return None
 
 
-def ucs_solver(start_board, goal_board):
-    return informed_solver(start_board, goal_board, ucs_f_function)
+# compact_informed_solver packs each fringe entry into one int:
+# f-value, then (MAX_DEPTH - depth) so deeper nodes win ties, then the arena index
+INDEX_BITS = 32
+INDEX_MASK = (1 << INDEX_BITS) - 1
+DEPTH_BITS = 16
+MAX_DEPTH = (1 << DEPTH_BITS) - 1
+FVALUE_SHIFT = INDEX_BITS + DEPTH_BITS
+
+
+def compact_informed_solver(start_board, goal_board, f_function, explored=None):
+    """
+        Same search as informed_solver, but the nodes live in a StateArena.StateArena (parallel
+        arrays) instead of one State per generated board. The fringe holds single ints made of the
+        f-value, the depth (deeper first on ties) and the node's arena index, the explored set holds
+        packed board ints, and only the solution path is turned back into States. This fits several
+        times more nodes in the same memory. Boards are packed (see Board.PackedBoard), and f-values
+        must be integers. Boards of more than 16 cells do not fit the arena (see StateArena.fits)
+        and raise ValueError. A caller may pass its own explored set; afterwards len(explored) is
+        the number of expansions.
+    """
+    start_board, goal_board = pack_boards(start_board, goal_board)
+    geometry = start_board.geometry
+    if not StateArena.StateArena.fits(geometry):
+        raise ValueError(f"compact_informed_solver only handles boards of up to 16 cells, "
+                         f"not {geometry.rows}x{geometry.cols}")
+    if not start_board.is_solvable(goal_board):
+        return None
+    goal = goal_board.state
+    arena = StateArena.StateArena()
+    child_f_value = getattr(f_function, 'child_f_value', None)
+    childBoard = [(0, 1), (0, -1), (1, 0), (-1, 0)]
+    fvalue = f_function(start_board, 0)
+    fringe = [(fvalue << FVALUE_SHIFT) | (MAX_DEPTH << INDEX_BITS) | arena.add(start_board, -1, 0, fvalue)]
+    if explored is None:
+        explored = set()
+    while fringe:
+        key = heapq.heappop(fringe)
+        index = key & INDEX_MASK
+        packed_state = arena.boards[index]
+        if packed_state == goal:
+            return arena.to_state(index, geometry)
+        if packed_state in explored:
+            continue
+        explored.add(packed_state)
+        board = arena.board(index, geometry)
+        depth = arena.depths[index]
+        if child_f_value is not None:
+            # the root's h was never computed here, so child_f_value evaluates it
+            parent = State.State(board, None, depth, key >> FVALUE_SHIFT, arena.hvalues[index] if index else None)
+        tie_break = (MAX_DEPTH - depth - 1) << INDEX_BITS
+        for move in childBoard:
+            child = board.slide_blank(move)
+            if child is None or child.state in explored:
+                continue
+            h = 0
+            if child_f_value is None:
+                fvalue = f_function(child, depth + 1)
+            else:
+                fvalue, h = child_f_value(parent, child)
+            heapq.heappush(fringe, (fvalue << FVALUE_SHIFT) | tie_break | arena.add(child, index, depth + 1, fvalue, h))
+    return None
 
 
-def a_star_solver(start_board, goal_board, heuristic):
-    f_function = a_star_f_function_factory(heuristic, goal_board)
-    return informed_solver(start_board, goal_board, f_function)
+def ucs_solver(start_board, goal_board, packed=False):
+    return informed_solver(start_board, goal_board, ucs_f_function, packed)
+
+
+def a_star_solver(start_board, goal_board, heuristic, packed=False, weight=1):
+    f_function = a_star_f_function_factory(heuristic, goal_board, weight)
+    return informed_solver(start_board, goal_board, f_function, packed)
+
+
+def anytime_a_star(start_board, goal_board, heuristic, time_limit, weights=(5, 3, 2, 1.5, 1), packed=True):
+    """
+        Generator for callers with a latency budget. Runs weighted A* once per weight, from the
+        largest weight (a first answer within a few expansions) down to the smallest, and yields each
+        Goal State that is shorter than every one yielded before. Stops when time_limit seconds have
+        passed or the weights run out; if the last weight is 1, the last State yielded is optimal.
+        Use the most recent State received when the budget ends.
+    """
+    deadline = time.perf_counter() + time_limit
+    if not start_board.is_solvable(goal_board):
+        return
+    if packed:
+        start_board, goal_board = pack_boards(start_board, goal_board)
+    best = None
+    for weight in weights:
+        f_function = a_star_f_function_factory(heuristic, goal_board, weight)
+        fringe = [State.State(start_board, None, 0, f_function(start_board, 0))]
+        explored = {}
+        found = CONTINUE
+        steps = 0
+        while found == CONTINUE:
+            steps += 1
+            if steps % 64 == 0 and time.perf_counter() > deadline:
+                return
+            found = informed_search(fringe, goal_board, f_function, explored)
+        if isinstance(found, State.State) and (best is None or found.depth < best.depth):
+            best = found
+            yield found
+        if time.perf_counter() > deadline:
+            return
+
+
+class _BoundedState(State.State):
+    """
+        A State in memory_bounded_a_star's search tree
+
+        h - the heuristic value of the board, always set here (fvalue can be backed up above depth + h)
+        children - the child States currently held in memory
+        forgotten - board -> f-value of each child that was dropped to make room, so the child
+                    keeps its backed-up f-value when it is regenerated (and is never regenerated
+                    once its f-value is infinite)
+        expanded - whether the children have been generated at least once
+        live - False once the State itself has been dropped
+    """
+
+    __slots__ = ('children', 'forgotten', 'expanded', 'live')
+
+    def __init__(self, board, parent_state, depth, fvalue, h):
+        super().__init__(board, parent_state, depth, fvalue, h)
+        self.children = []
+        self.forgotten = {}
+        self.expanded = False
+        self.live = True
+
+    # a State is open (can be picked for expansion) until all of its children that could
+    # still lead to the goal are in memory
+    def is_open(self):
+        return not self.expanded or any(f != float('inf') for f in self.forgotten.values())
+
+
+def memory_bounded_a_star(start_board, goal_board, heuristic, max_nodes, packed=False, stats=None,
+                          observer=None):
+    """
+        SMA*-style A* that never holds more than max_nodes States (briefly up to 4 more while a
+        State is expanded). When the cap is hit, the worst leaves (largest f, shallowest first) are
+        dropped and their parents remember their f-values, so a parent's f-value stays a lower bound
+        and a dropped branch is regenerated only once it is the best again.
+        f-values of expanded States are backed up from their children, like SMA*.
+
+        Returns the Goal State, or None. The answer is optimal whenever the optimal path fits in
+        memory; paths longer than max_nodes - 4 moves cannot be represented and are given up on,
+        so with too small a cap the result may be a longer solution or None (found only after every
+        path that does fit has been ruled out, which can take a long time).
+        Boards that cannot reach the goal (see Board.is_solvable) return None without searching.
+
+        A caller may pass a stats dict, which is filled with:
+            'expansions' - States expanded
+            're_expansions' - expansions that regenerated children dropped earlier
+            'cap_hits' - expansions after which the node cap was exceeded
+            'pruned' - States dropped to stay under the cap
+            'peak_nodes' - the most States held in memory at once: those in the tree plus dropped
+                           ones still referenced by heap entries that have not been compacted away
+                           (at most a few times max_nodes)
+        so the cap can be sized: many re_expansions mean the limit is close to too small.
+        If an observer (see SearchObserver.py) is given, it records statistics about the search.
+    """
+    if max_nodes < 5:
+        raise ValueError("memory_bounded_a_star needs room for at least 5 nodes")
+    if stats is None:
+        stats = {}
+    stats.update(expansions=0, re_expansions=0, cap_hits=0, pruned=0, peak_nodes=1)
+    if not start_board.is_solvable(goal_board):
+        return None
+    if packed:
+        start_board, goal_board = pack_boards(start_board, goal_board)
+    update = getattr(heuristic, 'update', None)
+    childBoard = [(0, 1), (0, -1), (1, 0), (-1, 0)]
+    depth_limit = max_nodes - 4
+    inf = float('inf')
+
+    # best holds (f, -depth, n, State) for open States; worst holds (-f, depth, n, State) for leaves.
+    # Outdated entries are skipped when they come off the heap, and both heaps are compacted once they
+    # hold more than compact_at entries, so dropped States (and their boards) are really released.
+    best, worst = [], []
+    compact_at = 4 * max_nodes + 16
+    counter = iter(range(1 << 62))
+    # board -> the State in memory for it, so a board is not stored twice at the same or a worse depth
+    in_memory = {}
+
+    h = heuristic(start_board, goal_board)
+    root = _BoundedState(start_board, None, 0, h, h)
+    in_memory[start_board] = root
+    heapq.heappush(best, (root.fvalue, 0, next(counter), root))
+    nodes = 1
+    # States dropped from the tree since the heaps were last compacted (some may already be freed)
+    dropped = 0
+
+    # recomputes the f-values of state and its ancestors from their children after a change below
+    def back_up(state):
+        while state is not None and state.expanded:
+            fvalue = min(min(state.forgotten.values(), default=inf),
+                         min((child.fvalue for child in state.children), default=inf))
+            if fvalue == state.fvalue:
+                return
+            state.fvalue = fvalue
+            if state.is_open():
+                heapq.heappush(best, (fvalue, -state.depth, next(counter), state))
+            state = state.parent_state
+
+    # drops the worst leaf; returns False if no leaf can be dropped
+    def prune():
+        while worst:
+            negative_f, depth, _, state = heapq.heappop(worst)
+            if not state.live or state.children or state.parent_state is None or -negative_f != state.fvalue:
+                continue
+            parent = state.parent_state
+            state.live = False
+            if in_memory.get(state.board) is state:
+                del in_memory[state.board]
+            parent.children.remove(state)
+            parent.forgotten[state.board] = state.fvalue
+            if state.fvalue != inf:
+                heapq.heappush(best, (parent.fvalue, -parent.depth, next(counter), parent))
+            if not parent.children:
+                heapq.heappush(worst, (-parent.fvalue, parent.depth, next(counter), parent))
+            return True
+        return False
+
+    # rebuilds both heaps with only their current entries, one per State
+    def compact():
+        seen = set()
+        kept = []
+        for entry in best:
+            state = entry[3]
+            if state.live and entry[0] == state.fvalue and id(state) not in seen and state.is_open():
+                seen.add(id(state))
+                kept.append(entry)
+        best[:] = kept
+        heapq.heapify(best)
+        seen.clear()
+        kept = []
+        for entry in worst:
+            state = entry[3]
+            if (state.live and -entry[0] == state.fvalue and id(state) not in seen and not state.children
+                    and state.parent_state is not None):
+                seen.add(id(state))
+                kept.append(entry)
+        worst[:] = kept
+        heapq.heapify(worst)
+
+    while best:
+        fvalue, _, _, state = heapq.heappop(best)
+        if not state.live or not state.is_open() or fvalue != state.fvalue:
+            continue
+        if fvalue == inf:
+            return None
+        if state.board == goal_board:
+            return state
+        if state.expanded:
+            stats['re_expansions'] += 1
+        stats['expansions'] += 1
+        if observer is not None:
+            observer.expanded(fvalue, nodes)
+        forgotten = state.forgotten
+        present = {child.board for child in state.children}
+        if state.parent_state is not None:
+            present.add(state.parent_state.board)
+        depth = state.depth + 1
+        for move in childBoard:
+            board = state.board.slide_blank(move)
+            if board is None or board in present:
+                continue
+            known = in_memory.get(board)
+            if known is not None and known.depth <= depth:
+                if observer is not None:
+                    observer.duplicates += 1
+                continue
+            h = heuristic(board, goal_board) if update is None else update(state.h, state.board, board)
+            child_f = max(depth + h, state.fvalue, forgotten.get(board, 0))
+            if depth >= depth_limit and board != goal_board:
+                child_f = inf
+            if child_f == inf:
+                forgotten[board] = inf
+                continue
+            child = _BoundedState(board, state, depth, child_f, h)
+            in_memory[board] = child
+            state.children.append(child)
+            nodes += 1
+            heapq.heappush(best, (child_f, -depth, next(counter), child))
+            heapq.heappush(worst, (-child_f, depth, next(counter), child))
+            if observer is not None:
+                observer.generated += 1
+        state.expanded = True
+        state.forgotten = {board: f for board, f in forgotten.items() if f == inf}
+        back_up(state)
+        if not state.children:
+            heapq.heappush(worst, (-state.fvalue, state.depth, next(counter), state))
+        if nodes + dropped > stats['peak_nodes']:
+            stats['peak_nodes'] = nodes + dropped
+        if nodes > max_nodes:
+            stats['cap_hits'] += 1
+            while nodes > max_nodes and prune():
+                nodes -= 1
+                dropped += 1
+                stats['pruned'] += 1
+        if len(best) + len(worst) > compact_at:
+            compact()
+            dropped = 0
+    return None
 
 #################################
 # Bonus Problem - IDS (10pts)
@@ -217,8 +847,83 @@ def a_star_solver(start_board, goal_board, heuristic):
 # If there is a solution within final_depth moves, ids should return the board.
 
 
+def ida_star(start_board, goal_board, heuristic=None, final_depth=None, stats=None):
+    """
+        Iterative-deepening A* (plain IDS when heuristic is None). Runs depth-first searches bounded
+        by f = depth + heuristic, raising the bound to the smallest f that exceeded it each round.
+        Returns the solution as a list of moves (see Board.slide_blank), or None if there is none
+        within final_depth moves.
+
+        Memory is linear in the solution depth: one board is changed in place with move_blank and
+        undone on the way back, no States are created, and the move that would undo the previous
+        move is never tried. Heuristics with a delta method (see ManhattanHeuristic) are updated
+        per move instead of re-evaluated.
+        A caller may pass a stats dict, which is filled with 'expansions' (boards expanded, summed over
+        all iterations) and 'iterations' (depth-first searches run).
+    """
+    if stats is None:
+        stats = {}
+    stats.update(expansions=0, iterations=0)
+    if not start_board.is_solvable(goal_board):
+        return None
+    if isinstance(start_board, Board.PackedBoard):
+        board = start_board.unpack()
+    else:
+        board = start_board.duplicate()
+    goal_matrix = goal_board.matrix
+    cols = len(goal_matrix[0])
+    delta = getattr(heuristic, 'delta', None)
+    moves = [(0, 1), (0, -1), (1, 0), (-1, 0)]
+    path = []
+
+    # returns None if the goal was found (leaving its moves in path),
+    # otherwise the smallest f-value that was over the bound
+    def bounded_search(depth, h, bound, previous):
+        f = depth + h
+        if f > bound:
+            return f
+        if board.matrix == goal_matrix:
+            return None
+        stats['expansions'] += 1
+        smallest = float('inf')
+        for move in moves:
+            if previous is not None and move[0] == -previous[0] and move[1] == -previous[1]:
+                continue
+            r, c = board.blankPos
+            if not board.move_blank(move):
+                continue
+            if delta is not None:
+                child_h = h + delta(board.matrix[r][c], board.blankIdx, r * cols + c)
+            elif heuristic is not None:
+                child_h = heuristic(board, goal_board)
+            else:
+                child_h = 0
+            path.append(move)
+            result = bounded_search(depth + 1, child_h, bound, move)
+            if result is None:
+                return None
+            path.pop()
+            board.move_blank((-move[0], -move[1]))
+            smallest = min(smallest, result)
+        return smallest
+
+    h = 0 if heuristic is None else heuristic(board, goal_board)
+    bound = h
+    while final_depth is None or bound <= final_depth:
+        stats['iterations'] += 1
+        result = bounded_search(0, h, bound, None)
+        if result is None:
+            return path
+        if result == float('inf'):
+            return None
+        bound = result
+    return None
+
+
 def ids(start_board, goal_board, final_depth):
-    return True
+    if ida_star(start_board, goal_board, None, final_depth) is None:
+        return None
+    return goal_board.duplicate()
 ###########################
 # Main method for testing #
 ###########################
@@ -258,6 +963,14 @@ def main():
     assert hasattr(a_star_f_function_factory(None, goal_board), '__call__')
 
     # This section is for you to create tests for your own heuristic
+    assert my_heuristic(goal_board, goal_board) == 0
+    assert my_heuristic(simple_board, goal_board) == 2
+
+    # Incremental f-values must not depend on how the parent State was built
+    f_function = a_star_f_function_factory(ManhattanHeuristic(goal_board), goal_board)
+    fringe1 = []
+    informed_expansion(State.State(Board.Board([[8, 6, 7], [2, 5, 4], [3, 0, 1]]), None, 0, 0), fringe1, f_function)
+    assert all(state.fvalue == f_function(state.board, 1) for state in fringe1)
 
     # Simple test for Informed Expansion
     node1 = State.State(simple_board, None, 0, 0)
@@ -276,10 +989,10 @@ def main():
     assert type(informed_search(fringe1, goal_board, ucs_f_function, explored)) is State.State
 
     # Simple test for IDS
-    #node1 = State.State(simple_board, None, 0, 0)
-    #assert ids(node1.board, goal_board, 1) is None
-    #result = ids(node1.board, goal_board, 2)
-    #assert type(result) is Board.Board
+    node1 = State.State(simple_board, None, 0, 0)
+    assert ids(node1.board, goal_board, 1) is None
+    result = ids(node1.board, goal_board, 2)
+    assert type(result) is Board.Board
 
     # 15-Puzzle Tests
 
@@ -295,6 +1008,16 @@ def main():
     # print(goal_board)
     # print(simple_board)
 
+    # A PackedBoard equals and hashes like its Board, even when the packed state is over 2^61
+    # (which Python's hash() would reduce)
+    packed_test_board = Board.Board([[5, 1, 2, 3],
+                                     [4, 6, 7, 8],
+                                     [9, 10, 11, 12],
+                                     [13, 14, 15, 0]])
+    assert packed_test_board.pack() == packed_test_board
+    assert packed_test_board == packed_test_board.pack()
+    assert hash(packed_test_board.pack()) == hash(packed_test_board)
+
     fringe1 = []
     node1 = State.State(simple_board, None, 0, 0)
     expand_fringe(node1, fringe1)
@@ -318,6 +1041,8 @@ def main():
     assert hasattr(a_star_f_function_factory(None, goal_board), '__call__')
 
     # This section is for you to create tests for your own heuristic
+    assert my_heuristic(goal_board, goal_board) == 0
+    assert my_heuristic(simple_board, goal_board) == 3
 
 
     # Simple test for Informed Expansion
@@ -337,10 +1062,63 @@ def main():
     assert type(informed_search(fringe1, goal_board, ucs_f_function, explored)) is State.State
 
     # Simple test for IDS
-    #node1 = State.State(simple_board, None, 0, 0)
-    #assert ids(node1.board, goal_board, 1) == None
-    #result = ids(node1.board, goal_board, 4)
-    #assert type(result) is Board.Board
+    node1 = State.State(simple_board, None, 0, 0)
+    assert ids(node1.board, goal_board, 1) == None
+    result = ids(node1.board, goal_board, 4)
+    assert type(result) is Board.Board
+
+    # Solvability pre-check: swapping two tiles flips the parity, so one board of each pair
+    # below can reach its goal and the other cannot
+    eight_goal = Board.Board([[1, 2, 3], [4, 5, 6], [7, 8, 0]])
+    assert Board.Board([[1, 2, 3], [4, 5, 6], [7, 0, 8]]).is_solvable(eight_goal)
+    assert not Board.Board([[2, 1, 3], [4, 5, 6], [7, 8, 0]]).is_solvable(eight_goal)
+    two_by_four_goal = Board.Board([[1, 2, 3, 4], [5, 6, 7, 0]])
+    assert Board.Board([[1, 2, 3, 0], [5, 6, 7, 4]]).is_solvable(two_by_four_goal)
+    assert not Board.Board([[1, 2, 3, 4], [5, 7, 6, 0]]).is_solvable(two_by_four_goal)
+    assert simple_board.is_solvable(goal_board)
+    assert not Board.Board([[1, 2, 3, 4],
+                            [5, 6, 7, 8],
+                            [9, 10, 11, 12],
+                            [13, 15, 14, 0]]).is_solvable(goal_board)
+
+    # The solvers give up on an unsolvable board without searching (ida_star would never stop)
+    unsolvable_board = Board.Board([[2, 1, 3], [4, 5, 6], [7, 8, 0]])
+    assert a_star_solver(unsolvable_board, eight_goal, ManhattanHeuristic(eight_goal)) is None
+    assert uninformed_solver(unsolvable_board, 40, eight_goal) is None
+    assert ida_star(unsolvable_board, eight_goal, ManhattanHeuristic(eight_goal)) is None
+
+    # The other solvers must find the same optimal depth as a_star_solver on these boards
+    fifteen_board = Board.Board([[1, 6, 3, 4],
+                                 [5, 7, 0, 8],
+                                 [9, 10, 2, 15],
+                                 [13, 14, 12, 11]])
+    depth_tests = []
+    for start, goal in [(Board.Board([[1, 2, 0], [4, 5, 3], [7, 8, 6]]), eight_goal),
+                        (Board.Board([[8, 6, 7], [2, 5, 4], [3, 0, 1]]), eight_goal),
+                        (simple_board, goal_board),
+                        (fifteen_board, goal_board)]:
+        heuristic = ManhattanHeuristic(goal)
+        depth_tests.append((start, goal, heuristic, a_star_solver(start, goal, heuristic).depth))
+    assert [depth for _, _, _, depth in depth_tests] == [2, 31, 3, 17]
+
+    for start, goal, heuristic, depth in depth_tests:
+        assert bidirectional_solver(start, goal).depth == depth
+        assert bidirectional_solver(start, goal, None, True).depth == depth
+
+    for start, goal, heuristic, depth in depth_tests:
+        f_function = a_star_f_function_factory(heuristic, goal)
+        assert informed_solver(start, goal, f_function, True, None, 'best-g').depth == depth
+        assert informed_solver(start, goal, f_function, True, None, 'bucket').depth == depth
+        assert compact_informed_solver(start, goal, f_function).depth == depth
+
+    # A cap of 60 States is far below what these searches generate, so the deeper boards
+    # can only be solved by dropping and regenerating States
+    for start, goal, heuristic, depth in depth_tests:
+        stats = {}
+        assert memory_bounded_a_star(start, goal, heuristic, 60, stats=stats).depth == depth
+        if depth > 10:
+            assert stats['pruned'] > 0
+        assert memory_bounded_a_star(start, goal, heuristic, 100000, True).depth == depth
 
 
 if __name__ == "__main__":
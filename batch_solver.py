@@ -0,0 +1,255 @@
+#!/usr/bin/python3
+
+##################################
+# Batch Sliding-Puzzle Solver
+##################################
+# Solves a file of start boards across a pool of worker processes.
+#
+# Input: one board per line, tiles in row-major order separated by spaces or commas, with 0
+# as the blank. Blank lines and lines starting with '#' are skipped. Square boards are sized
+# automatically; pass --shape ROWSxCOLS for anything else.
+#
+# Output: one JSON object per line, written as soon as each instance finishes (so in completion
+# order, not input order): {"index", "status", "length", "expansions", "seconds"}, where status is
+# one of "solved", "unsolvable", "unsupported", "no solution", "timeout", "memory" or "error"
+# ("unsupported" means the algorithm cannot handle boards of that size, as compact above 16 cells).
+#
+# The heuristic is built once in the parent before the workers start, so forked workers share
+# its tables read-only (pattern databases are memory-mapped files and share pages in any case).
+# Each worker enforces the per-instance time limit with an interval timer and the memory limit
+# with an address-space rlimit, so one hard case is reported and skipped instead of stalling the batch.
+#
+# Usage:
+#     python batch_solver.py boards.txt results.jsonl --heuristic linear-conflict --processes 8 \
+#         --time-limit 30 --memory-limit 2048
+
+import argparse
+import gc
+import json
+import multiprocessing
+import resource
+import signal
+import sys
+import time
+
+import Board
+import PatternDatabase
+import StateArena
+import a3_PeterManolis as a3
+
+HEURISTICS = ['manhattan', 'linear-conflict', 'pdb']
+ALGORITHMS = ['astar', 'compact', 'idastar']
+
+# set in the parent before the pool starts (and so inherited by forked workers),
+# or by _init_worker in workers that were not forked
+_worker = {}
+
+
+class InstanceTimeout(Exception):
+    pass
+
+
+# returns the usual goal board for the given size: tiles 1..n in order with the blank last
+def standard_goal(rows, cols):
+    tiles = list(range(1, rows * cols)) + [0]
+    return Board.Board([tiles[r * cols:(r + 1) * cols] for r in range(rows)])
+
+
+# parses one input line into a Board, or returns None for blank and comment lines
+def parse_board(line, shape=None):
+    line = line.strip()
+    if not line or line.startswith('#'):
+        return None
+    tiles = [int(val) for val in line.replace(',', ' ').split()]
+    if shape is None:
+        side = int(round(len(tiles) ** 0.5))
+        if side * side != len(tiles):
+            raise ValueError(f'{len(tiles)} tiles do not make a square board; pass a shape')
+        shape = (side, side)
+    rows, cols = shape
+    if rows * cols != len(tiles):
+        raise ValueError(f'Expected {rows * cols} tiles but got {len(tiles)}')
+    return Board.Board([tiles[r * cols:(r + 1) * cols] for r in range(rows)])
+
+
+# yields (index, tiles, problem) for every board in the file, reading it lazily; a line that cannot
+# be parsed has tiles None and problem saying why, so it is reported instead of stopping the batch
+def read_instances(path, shape=None):
+    with open(path) as f:
+        index = 0
+        for line in f:
+            try:
+                board = parse_board(line, shape)
+            except ValueError as error:
+                yield index, None, str(error)
+                index += 1
+                continue
+            if board is not None:
+                yield index, board.tiles(), None
+                index += 1
+
+
+# builds the named heuristic for goal_board
+def make_heuristic(name, goal_board, pdb_partition=None, pdb_directory='.'):
+    if name == 'manhattan':
+        return a3.ManhattanHeuristic(goal_board)
+    if name == 'linear-conflict':
+        return a3.LinearConflictHeuristic(goal_board)
+    if name == 'pdb':
+        if pdb_partition is None:
+            pdb_partition = {(3, 3): '4-4', (4, 4): '5-5-5'}[(len(goal_board.matrix), len(goal_board.matrix[0]))]
+        return PatternDatabase.AdditivePatternDatabase(goal_board, pdb_partition, pdb_directory)
+    raise ValueError(f'Unknown heuristic: {name}')
+
+
+# solves one board and returns (status, length, expansions); runs inside a worker
+def solve(start_board, goal_board, heuristic, algorithm):
+    if algorithm == 'compact' and not StateArena.StateArena.fits(goal_board.pack().geometry):
+        return 'unsupported', None, None
+    if not start_board.is_solvable(goal_board):
+        return 'unsolvable', None, 0
+    if algorithm == 'idastar':
+        stats = {}
+        moves = a3.ida_star(start_board, goal_board, heuristic, stats=stats)
+        if moves is None:
+            return 'no solution', None, stats['expansions']
+        return 'solved', len(moves), stats['expansions']
+    f_function = a3.a_star_f_function_factory(heuristic, goal_board)
+    if algorithm == 'compact':
+        explored = set()
+        found = a3.compact_informed_solver(start_board, goal_board, f_function, explored)
+    else:
+        explored = {}
+        found = a3.informed_solver(start_board, goal_board, f_function, True, explored)
+    if found is None:
+        return 'no solution', None, len(explored)
+    return 'solved', found.depth, len(explored)
+
+
+def _raise_timeout(signum, frame):
+    raise InstanceTimeout()
+
+
+def _init_worker(settings):
+    if not _worker:
+        _worker.update(settings)
+        _worker['heuristic'] = make_heuristic(settings['heuristic_name'], settings['goal_board'],
+                                              settings['pdb_partition'], settings['pdb_directory'])
+    if settings['memory_limit'] is not None:
+        limit = settings['memory_limit'] * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    signal.signal(signal.SIGALRM, _raise_timeout)
+
+
+# the task run by the pool for each instance
+def _solve_instance(instance):
+    index, tiles, problem = instance
+    rows, cols = _worker['shape']
+    result = {'index': index, 'status': 'error', 'length': None, 'expansions': None}
+    if problem is None and len(tiles) != rows * cols:
+        problem = f'Expected {rows * cols} tiles but got {len(tiles)}'
+    if problem is not None:
+        result.update(error=problem, seconds=0.0)
+        return result
+    started = time.perf_counter()
+    if _worker['time_limit'] is not None:
+        signal.setitimer(signal.ITIMER_REAL, _worker['time_limit'])
+    try:
+        start_board = Board.Board([tiles[r * cols:(r + 1) * cols] for r in range(rows)])
+        status, length, expansions = solve(start_board, _worker['goal_board'], _worker['heuristic'],
+                                           _worker['algorithm'])
+        result.update(status=status, length=length, expansions=expansions)
+    except InstanceTimeout:
+        result['status'] = 'timeout'
+    except MemoryError:
+        result['status'] = 'memory'
+    except Exception as error:
+        result['error'] = repr(error)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        result['seconds'] = round(time.perf_counter() - started, 6)
+        gc.collect()
+    return result
+
+
+def run_batch(input_path, output, shape=None, goal_board=None, heuristic='linear-conflict',
+              algorithm='astar', processes=None, time_limit=None, memory_limit=None,
+              pdb_partition=None, pdb_directory='.'):
+    """
+        Solves every board in input_path on a pool of processes, writing one JSON line per instance
+        to the open file output in completion order. time_limit is in seconds and memory_limit in MiB
+        (per worker); None means no limit. Returns a dict counting the results by status.
+    """
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f'Unknown algorithm: {algorithm}')
+    instances = read_instances(input_path, shape)
+    # lines that could not be parsed before the first good board are held back until it sets the shape
+    leading = []
+    for first in instances:
+        if first[1] is not None:
+            break
+        leading.append(first)
+    else:
+        first = None
+    if first is None and not leading:
+        return {}
+    if shape is None:
+        side = int(round(len(first[1]) ** 0.5)) if first is not None else 3
+        shape = (side, side)
+    if goal_board is None:
+        goal_board = standard_goal(*shape)
+    settings = {'shape': shape, 'goal_board': goal_board, 'heuristic_name': heuristic,
+                'algorithm': algorithm, 'time_limit': time_limit, 'memory_limit': memory_limit,
+                'pdb_partition': pdb_partition, 'pdb_directory': pdb_directory}
+
+    # Build the tables once here; forked workers inherit them instead of rebuilding
+    _worker.clear()
+    _worker.update(settings)
+    _worker['heuristic'] = make_heuristic(heuristic, goal_board, pdb_partition, pdb_directory)
+
+    def all_instances():
+        yield from leading
+        if first is not None:
+            yield first
+            yield from instances
+
+    counts = {}
+    context = multiprocessing.get_context('fork' if 'fork' in multiprocessing.get_all_start_methods() else None)
+    with context.Pool(processes, initializer=_init_worker, initargs=(settings,)) as pool:
+        for result in pool.imap_unordered(_solve_instance, all_instances(), chunksize=1):
+            output.write(json.dumps(result) + '\n')
+            output.flush()
+            counts[result['status']] = counts.get(result['status'], 0) + 1
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Solve many sliding puzzles in parallel.')
+    parser.add_argument('input', help='file with one start board per line')
+    parser.add_argument('output', help="results file (JSON lines), or '-' for stdout")
+    parser.add_argument('--shape', help='board shape as ROWSxCOLS (default: square)')
+    parser.add_argument('--goal', help='goal board tiles (default: 1..n with the blank last)')
+    parser.add_argument('--heuristic', choices=HEURISTICS, default='linear-conflict')
+    parser.add_argument('--algorithm', choices=ALGORITHMS, default='astar')
+    parser.add_argument('--processes', type=int, default=None, help='worker count (default: CPU count)')
+    parser.add_argument('--time-limit', type=float, default=None, help='seconds per instance')
+    parser.add_argument('--memory-limit', type=int, default=None, help='MiB per worker')
+    parser.add_argument('--pdb-partition', default=None, help="e.g. '5-5-5' or '6-6-3'")
+    parser.add_argument('--pdb-directory', default='.', help='where pattern databases are stored')
+    args = parser.parse_args(argv)
+
+    shape = tuple(int(n) for n in args.shape.lower().split('x')) if args.shape else None
+    goal_board = parse_board(args.goal, shape) if args.goal else None
+    output = sys.stdout if args.output == '-' else open(args.output, 'w')
+    try:
+        counts = run_batch(args.input, output, shape, goal_board, args.heuristic, args.algorithm,
+                           args.processes, args.time_limit, args.memory_limit,
+                           args.pdb_partition, args.pdb_directory)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    print(counts, file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
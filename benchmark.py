@@ -0,0 +1,441 @@
+#!/usr/bin/python3
+
+##################################
+# Sliding-Puzzle Benchmark Suite
+##################################
+# Runs each solver/heuristic combination from a3_PeterManolis over standard instance sets and
+# writes JSON with path lengths, expansions, nodes/sec, wall time and peak RSS.
+#
+# Instance sets:
+#     8-puzzle-depths - one 8-puzzle instance for every optimal solution depth (0 to 31), taken
+#                       from a breadth-first enumeration from the goal, so the set is fixed
+#     8-puzzle-walks  - seeded 200-move random walks from the 8-puzzle goal
+#     15-puzzle-walks - seeded 40-move random walks from the 15-puzzle goal (depth-limited)
+#     korf100-easy    - the Korf 100 instances whose optimal solutions are at most KORF_EASY_DEPTH
+#                       moves (10 of them), small enough for a pure-Python IDA* run
+#     korf100         - all of Korf's 100 15-puzzle instances (KORF100 below), or the instances in
+#                       the file given with --korf (one per line: 16 tiles, optionally after an id)
+#
+# For the Korf sets each result also records the known optimal length, and the summary counts
+# the solutions that were longer.
+#
+# Each combination runs in a freshly spawned (not forked) process, so its peak RSS is its own and
+# does not include the memory the parent used building the instance sets.
+#
+# Usage:
+#     python benchmark.py --output results.json
+#     python benchmark.py --sets 15-puzzle-walks --solvers astar-bucket idastar --output new.json \
+#         --compare results.json
+
+import argparse
+import json
+import multiprocessing
+import platform
+import random
+import resource
+import signal
+import sys
+import time
+
+import Board
+import a3_PeterManolis as a3
+import batch_solver
+
+MOVES = [(0, 1), (0, -1), (1, 0), (-1, 0)]
+
+SOLVERS = ['astar', 'astar-best-g', 'astar-bucket', 'compact', 'idastar', 'bidirectional']
+HEURISTICS = ['manhattan', 'linear-conflict', 'pdb']
+SETS = ['8-puzzle-depths', '8-puzzle-walks', '15-puzzle-walks', 'korf100-easy', 'korf100']
+
+DEFAULT_RUNS = {
+    '8-puzzle-depths': (SOLVERS, ['manhattan', 'linear-conflict']),
+    '8-puzzle-walks': (SOLVERS, ['manhattan', 'linear-conflict']),
+    '15-puzzle-walks': (['astar-bucket', 'compact', 'idastar'], ['manhattan', 'linear-conflict']),
+    'korf100-easy': (['idastar'], ['linear-conflict']),
+    'korf100': (['idastar'], ['linear-conflict']),
+}
+
+# Korf's 100 random 15-puzzle instances (R. E. Korf, "Depth-first iterative-deepening: an optimal
+# admissible tree search", Artificial Intelligence 27, 1985) as (tiles in row-major order, optimal
+# solution length). Their goal has the blank in the top left corner: 0 1 2 ... 15.
+KORF_GOAL = list(range(16))
+KORF_EASY_DEPTH = 45
+KORF100 = [
+    ([14, 13, 15, 7, 11, 12, 9, 5, 6, 0, 2, 1, 4, 8, 10, 3], 57),
+    ([13, 5, 4, 10, 9, 12, 8, 14, 2, 3, 7, 1, 0, 15, 11, 6], 55),
+    ([14, 7, 8, 2, 13, 11, 10, 4, 9, 12, 5, 0, 3, 6, 1, 15], 59),
+    ([5, 12, 10, 7, 15, 11, 14, 0, 8, 2, 1, 13, 3, 4, 9, 6], 56),
+    ([4, 7, 14, 13, 10, 3, 9, 12, 11, 5, 6, 15, 1, 2, 8, 0], 56),
+    ([14, 7, 1, 9, 12, 3, 6, 15, 8, 11, 2, 5, 10, 0, 4, 13], 52),
+    ([2, 11, 15, 5, 13, 4, 6, 7, 12, 8, 10, 1, 9, 3, 14, 0], 52),
+    ([12, 11, 15, 3, 8, 0, 4, 2, 6, 13, 9, 5, 14, 1, 10, 7], 50),
+    ([3, 14, 9, 11, 5, 4, 8, 2, 13, 12, 6, 7, 10, 1, 15, 0], 46),
+    ([13, 11, 8, 9, 0, 15, 7, 10, 4, 3, 6, 14, 5, 12, 2, 1], 59),
+    ([5, 9, 13, 14, 6, 3, 7, 12, 10, 8, 4, 0, 15, 2, 11, 1], 57),
+    ([14, 1, 9, 6, 4, 8, 12, 5, 7, 2, 3, 0, 10, 11, 13, 15], 45),
+    ([3, 6, 5, 2, 10, 0, 15, 14, 1, 4, 13, 12, 9, 8, 11, 7], 46),
+    ([7, 6, 8, 1, 11, 5, 14, 10, 3, 4, 9, 13, 15, 2, 0, 12], 59),
+    ([13, 11, 4, 12, 1, 8, 9, 15, 6, 5, 14, 2, 7, 3, 10, 0], 62),
+    ([1, 3, 2, 5, 10, 9, 15, 6, 8, 14, 13, 11, 12, 4, 7, 0], 42),
+    ([15, 14, 0, 4, 11, 1, 6, 13, 7, 5, 8, 9, 3, 2, 10, 12], 66),
+    ([6, 0, 14, 12, 1, 15, 9, 10, 11, 4, 7, 2, 8, 3, 5, 13], 55),
+    ([7, 11, 8, 3, 14, 0, 6, 15, 1, 4, 13, 9, 5, 12, 2, 10], 46),
+    ([6, 12, 11, 3, 13, 7, 9, 15, 2, 14, 8, 10, 4, 1, 5, 0], 52),
+    ([12, 8, 14, 6, 11, 4, 7, 0, 5, 1, 10, 15, 3, 13, 9, 2], 54),
+    ([14, 3, 9, 1, 15, 8, 4, 5, 11, 7, 10, 13, 0, 2, 12, 6], 59),
+    ([10, 9, 3, 11, 0, 13, 2, 14, 5, 6, 4, 7, 8, 15, 1, 12], 49),
+    ([7, 3, 14, 13, 4, 1, 10, 8, 5, 12, 9, 11, 2, 15, 6, 0], 54),
+    ([11, 4, 2, 7, 1, 0, 10, 15, 6, 9, 14, 8, 3, 13, 5, 12], 52),
+    ([5, 7, 3, 12, 15, 13, 14, 8, 0, 10, 9, 6, 1, 4, 2, 11], 58),
+    ([14, 1, 8, 15, 2, 6, 0, 3, 9, 12, 10, 13, 4, 7, 5, 11], 53),
+    ([13, 14, 6, 12, 4, 5, 1, 0, 9, 3, 10, 2, 15, 11, 8, 7], 52),
+    ([9, 8, 0, 2, 15, 1, 4, 14, 3, 10, 7, 5, 11, 13, 6, 12], 54),
+    ([12, 15, 2, 6, 1, 14, 4, 8, 5, 3, 7, 0, 10, 13, 9, 11], 47),
+    ([12, 8, 15, 13, 1, 0, 5, 4, 6, 3, 2, 11, 9, 7, 14, 10], 50),
+    ([14, 10, 9, 4, 13, 6, 5, 8, 2, 12, 7, 0, 1, 3, 11, 15], 59),
+    ([14, 3, 5, 15, 11, 6, 13, 9, 0, 10, 2, 12, 4, 1, 7, 8], 60),
+    ([6, 11, 7, 8, 13, 2, 5, 4, 1, 10, 3, 9, 14, 0, 12, 15], 52),
+    ([1, 6, 12, 14, 3, 2, 15, 8, 4, 5, 13, 9, 0, 7, 11, 10], 55),
+    ([12, 6, 0, 4, 7, 3, 15, 1, 13, 9, 8, 11, 2, 14, 5, 10], 52),
+    ([8, 1, 7, 12, 11, 0, 10, 5, 9, 15, 6, 13, 14, 2, 3, 4], 58),
+    ([7, 15, 8, 2, 13, 6, 3, 12, 11, 0, 4, 10, 9, 5, 1, 14], 53),
+    ([9, 0, 4, 10, 1, 14, 15, 3, 12, 6, 5, 7, 11, 13, 8, 2], 49),
+    ([11, 5, 1, 14, 4, 12, 10, 0, 2, 7, 13, 3, 9, 15, 6, 8], 54),
+    ([8, 13, 10, 9, 11, 3, 15, 6, 0, 1, 2, 14, 12, 5, 4, 7], 54),
+    ([4, 5, 7, 2, 9, 14, 12, 13, 0, 3, 6, 11, 8, 1, 15, 10], 42),
+    ([11, 15, 14, 13, 1, 9, 10, 4, 3, 6, 2, 12, 7, 5, 8, 0], 64),
+    ([12, 9, 0, 6, 8, 3, 5, 14, 2, 4, 11, 7, 10, 1, 15, 13], 50),
+    ([3, 14, 9, 7, 12, 15, 0, 4, 1, 8, 5, 6, 11, 10, 2, 13], 51),
+    ([8, 4, 6, 1, 14, 12, 2, 15, 13, 10, 9, 5, 3, 7, 0, 11], 49),
+    ([6, 10, 1, 14, 15, 8, 3, 5, 13, 0, 2, 7, 4, 9, 11, 12], 47),
+    ([8, 11, 4, 6, 7, 3, 10, 9, 2, 12, 15, 13, 0, 1, 5, 14], 49),
+    ([10, 0, 2, 4, 5, 1, 6, 12, 11, 13, 9, 7, 15, 3, 14, 8], 59),
+    ([12, 5, 13, 11, 2, 10, 0, 9, 7, 8, 4, 3, 14, 6, 15, 1], 53),
+    ([10, 2, 8, 4, 15, 0, 1, 14, 11, 13, 3, 6, 9, 7, 5, 12], 56),
+    ([10, 8, 0, 12, 3, 7, 6, 2, 1, 14, 4, 11, 15, 13, 9, 5], 56),
+    ([14, 9, 12, 13, 15, 4, 8, 10, 0, 2, 1, 7, 3, 11, 5, 6], 64),
+    ([12, 11, 0, 8, 10, 2, 13, 15, 5, 4, 7, 3, 6, 9, 14, 1], 56),
+    ([13, 8, 14, 3, 9, 1, 0, 7, 15, 5, 4, 10, 12, 2, 6, 11], 41),
+    ([3, 15, 2, 5, 11, 6, 4, 7, 12, 9, 1, 0, 13, 14, 10, 8], 55),
+    ([5, 11, 6, 9, 4, 13, 12, 0, 8, 2, 15, 10, 1, 7, 3, 14], 50),
+    ([5, 0, 15, 8, 4, 6, 1, 14, 10, 11, 3, 9, 7, 12, 2, 13], 51),
+    ([15, 14, 6, 7, 10, 1, 0, 11, 12, 8, 4, 9, 2, 5, 13, 3], 57),
+    ([11, 14, 13, 1, 2, 3, 12, 4, 15, 7, 9, 5, 10, 6, 8, 0], 66),
+    ([6, 13, 3, 2, 11, 9, 5, 10, 1, 7, 12, 14, 8, 4, 0, 15], 45),
+    ([4, 6, 12, 0, 14, 2, 9, 13, 11, 8, 3, 15, 7, 10, 1, 5], 57),
+    ([8, 10, 9, 11, 14, 1, 7, 15, 13, 4, 0, 12, 6, 2, 5, 3], 56),
+    ([5, 2, 14, 0, 7, 8, 6, 3, 11, 12, 13, 15, 4, 10, 9, 1], 51),
+    ([7, 8, 3, 2, 10, 12, 4, 6, 11, 13, 5, 15, 0, 1, 9, 14], 47),
+    ([11, 6, 14, 12, 3, 5, 1, 15, 8, 0, 10, 13, 9, 7, 4, 2], 61),
+    ([7, 1, 2, 4, 8, 3, 6, 11, 10, 15, 0, 5, 14, 12, 13, 9], 50),
+    ([7, 3, 1, 13, 12, 10, 5, 2, 8, 0, 6, 11, 14, 15, 4, 9], 51),
+    ([6, 0, 5, 15, 1, 14, 4, 9, 2, 13, 8, 10, 11, 12, 7, 3], 53),
+    ([15, 1, 3, 12, 4, 0, 6, 5, 2, 8, 14, 9, 13, 10, 7, 11], 52),
+    ([5, 7, 0, 11, 12, 1, 9, 10, 15, 6, 2, 3, 8, 4, 13, 14], 44),
+    ([12, 15, 11, 10, 4, 5, 14, 0, 13, 7, 1, 2, 9, 8, 3, 6], 56),
+    ([6, 14, 10, 5, 15, 8, 7, 1, 3, 4, 2, 0, 12, 9, 11, 13], 49),
+    ([14, 13, 4, 11, 15, 8, 6, 9, 0, 7, 3, 1, 2, 10, 12, 5], 56),
+    ([14, 4, 0, 10, 6, 5, 1, 3, 9, 2, 13, 15, 12, 7, 8, 11], 48),
+    ([15, 10, 8, 3, 0, 6, 9, 5, 1, 14, 13, 11, 7, 2, 12, 4], 57),
+    ([0, 13, 2, 4, 12, 14, 6, 9, 15, 1, 10, 3, 11, 5, 8, 7], 54),
+    ([3, 14, 13, 6, 4, 15, 8, 9, 5, 12, 10, 0, 2, 7, 1, 11], 53),
+    ([0, 1, 9, 7, 11, 13, 5, 3, 14, 12, 4, 2, 8, 6, 10, 15], 42),
+    ([11, 0, 15, 8, 13, 12, 3, 5, 10, 1, 4, 6, 14, 9, 7, 2], 57),
+    ([13, 0, 9, 12, 11, 6, 3, 5, 15, 8, 1, 10, 4, 14, 2, 7], 53),
+    ([14, 10, 2, 1, 13, 9, 8, 11, 7, 3, 6, 12, 15, 5, 4, 0], 62),
+    ([12, 3, 9, 1, 4, 5, 10, 2, 6, 11, 15, 0, 14, 7, 13, 8], 49),
+    ([15, 8, 10, 7, 0, 12, 14, 1, 5, 9, 6, 3, 13, 11, 4, 2], 55),
+    ([4, 7, 13, 10, 1, 2, 9, 6, 12, 8, 14, 5, 3, 0, 11, 15], 44),
+    ([6, 0, 5, 10, 11, 12, 9, 2, 1, 7, 4, 3, 14, 8, 13, 15], 45),
+    ([9, 5, 11, 10, 13, 0, 2, 1, 8, 6, 14, 12, 4, 7, 3, 15], 52),
+    ([15, 2, 12, 11, 14, 13, 9, 5, 1, 3, 8, 7, 0, 10, 6, 4], 65),
+    ([11, 1, 7, 4, 10, 13, 3, 8, 9, 14, 0, 15, 6, 5, 2, 12], 54),
+    ([5, 4, 7, 1, 11, 12, 14, 15, 10, 13, 8, 6, 2, 0, 9, 3], 50),
+    ([9, 7, 5, 2, 14, 15, 12, 10, 11, 3, 6, 1, 8, 13, 0, 4], 57),
+    ([3, 2, 7, 9, 0, 15, 12, 4, 6, 11, 5, 14, 8, 13, 10, 1], 57),
+    ([13, 9, 14, 6, 12, 8, 1, 2, 3, 4, 0, 7, 5, 10, 11, 15], 46),
+    ([5, 7, 11, 8, 0, 14, 9, 13, 10, 12, 3, 15, 6, 1, 4, 2], 53),
+    ([4, 3, 6, 13, 7, 15, 9, 0, 10, 5, 8, 11, 2, 12, 1, 14], 50),
+    ([1, 7, 15, 14, 2, 6, 4, 9, 12, 11, 13, 3, 0, 8, 5, 10], 49),
+    ([9, 14, 5, 7, 8, 15, 1, 2, 10, 4, 13, 6, 12, 0, 11, 3], 44),
+    ([0, 11, 3, 12, 5, 2, 1, 9, 8, 10, 14, 15, 7, 4, 13, 6], 54),
+    ([7, 15, 4, 0, 10, 9, 2, 5, 12, 11, 13, 6, 1, 3, 14, 8], 57),
+    ([11, 4, 0, 8, 6, 10, 5, 13, 12, 7, 14, 3, 1, 2, 9, 15], 54),
+]
+
+
+class InstanceTimeout(Exception):
+    pass
+
+
+#################################
+# Instance Sets
+#################################
+
+# returns the board reached by a seeded random walk of the given length that never undoes its last move
+def random_walk(goal_board, length, seed):
+    rng = random.Random(seed)
+    board = goal_board.pack()
+    previous = None
+    for _ in range(length):
+        moves = [move for move in MOVES if previous is None or move != (-previous[0], -previous[1])]
+        while True:
+            move = rng.choice(moves)
+            child = board.slide_blank(move)
+            if child is not None:
+                break
+        board, previous = child, move
+    return board.unpack()
+
+
+def depth_instances(goal_board):
+    return [layer[0].board.unpack() for depth, layer in a3.breadth_first_layers(goal_board.pack())]
+
+
+# reads Korf-style instances (for KORF_GOAL) from a file
+def load_korf(path, limit=None):
+    boards = []
+    with open(path) as f:
+        for line in f:
+            tiles = line.replace(',', ' ').split()
+            if len(tiles) == 17:
+                tiles = tiles[1:]
+            if len(tiles) != 16:
+                continue
+            boards.append(batch_solver.parse_board(' '.join(tiles)))
+            if limit is not None and len(boards) == limit:
+                break
+    return boards
+
+
+def _korf_board(tiles):
+    return Board.Board([tiles[r * 4:(r + 1) * 4] for r in range(4)])
+
+
+# returns (goal_board, list of start boards, list of optimal lengths or None) for the named set
+def instance_set(name, korf_path=None, korf_limit=None):
+    if name == '8-puzzle-depths':
+        goal = batch_solver.standard_goal(3, 3)
+        return goal, depth_instances(goal), None
+    if name == '8-puzzle-walks':
+        goal = batch_solver.standard_goal(3, 3)
+        return goal, [random_walk(goal, 200, seed) for seed in range(20)], None
+    if name == '15-puzzle-walks':
+        goal = batch_solver.standard_goal(4, 4)
+        return goal, [random_walk(goal, 40, seed) for seed in range(10)], None
+    if name == 'korf100-easy':
+        instances = [(tiles, length) for tiles, length in KORF100 if length <= KORF_EASY_DEPTH][:korf_limit]
+    elif name == 'korf100':
+        if korf_path is not None:
+            return _korf_board(KORF_GOAL), load_korf(korf_path, korf_limit), None
+        instances = KORF100[:korf_limit]
+    else:
+        raise ValueError(f'Unknown instance set: {name}')
+    return (_korf_board(KORF_GOAL), [_korf_board(tiles) for tiles, _ in instances],
+            [length for _, length in instances])
+
+
+#################################
+# Running
+#################################
+
+# solves one instance and returns (length, expansions)
+def run_solver(solver, start_board, goal_board, heuristic):
+    stats = {}
+    if solver == 'idastar':
+        moves = a3.ida_star(start_board, goal_board, heuristic, stats=stats)
+        return (None if moves is None else len(moves)), stats['expansions']
+    if solver == 'bidirectional':
+        found = a3.bidirectional_solver(start_board, goal_board, None, True, stats)
+        return (None if found is None else found.depth), stats['expansions']
+    f_function = a3.a_star_f_function_factory(heuristic, goal_board)
+    if solver == 'compact':
+        explored = set()
+        found = a3.compact_informed_solver(start_board, goal_board, f_function, explored)
+    else:
+        open_list = {'astar': 'heap', 'astar-best-g': 'best-g', 'astar-bucket': 'bucket'}[solver]
+        explored = {}
+        found = a3.informed_solver(start_board, goal_board, f_function, True, explored, open_list)
+    return (None if found is None else found.depth), len(explored)
+
+
+# returns this process's own peak RSS in KB. ru_maxrss survives exec, so a spawned child would report
+# its parent's high-water mark; VmHWM belongs to the process's current address space only.
+def _peak_rss_kb():
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _raise_timeout(signum, frame):
+    raise InstanceTimeout()
+
+
+# runs one combination over a whole set; called in a freshly spawned process
+def _run_combination(goal_tiles, instances, shape, solver, heuristic_name, time_limit, pdb_directory):
+    rows, cols = shape
+    make = lambda tiles: Board.Board([tiles[r * cols:(r + 1) * cols] for r in range(rows)])
+    goal_board = make(goal_tiles)
+    heuristic = batch_solver.make_heuristic(heuristic_name, goal_board, None, pdb_directory)
+    signal.signal(signal.SIGALRM, _raise_timeout)
+    results = []
+    for index, tiles in enumerate(instances):
+        result = {'instance': index, 'status': 'error', 'length': None, 'expansions': None}
+        started = time.perf_counter()
+        if time_limit is not None:
+            signal.setitimer(signal.ITIMER_REAL, time_limit)
+        try:
+            length, expansions = run_solver(solver, make(tiles), goal_board, heuristic)
+            result.update(status='solved' if length is not None else 'no solution', length=length,
+                          expansions=expansions)
+        except InstanceTimeout:
+            result['status'] = 'timeout'
+        except MemoryError:
+            result['status'] = 'memory'
+        except Exception as error:
+            result['error'] = repr(error)
+        finally:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+        result['seconds'] = time.perf_counter() - started
+        results.append(result)
+    return results, _peak_rss_kb()
+
+
+def summarize(results, peak_rss_kb):
+    solved = [r for r in results if r['length'] is not None]
+    # seconds is the wall time over every instance, so turning solves into timeouts counts as slower;
+    # nodes/sec only has the solved instances' expansions, so it uses their time alone
+    seconds = sum(r['seconds'] for r in results)
+    solved_seconds = sum(r['seconds'] for r in solved)
+    tracked = [r for r in solved if r['expansions'] is not None]
+    expansions = sum(r['expansions'] for r in tracked) if tracked else None
+    return {
+        'instances': len(results),
+        'solved': len(solved),
+        'seconds': seconds,
+        'solved_seconds': solved_seconds,
+        'expansions': expansions,
+        'nodes_per_sec': (expansions / solved_seconds
+                          if expansions is not None and solved_seconds > 0 else None),
+        'peak_rss_kb': peak_rss_kb,
+        'suboptimal': (sum(1 for r in solved if r['length'] > r['optimal'])
+                       if solved and 'optimal' in solved[0] else None),
+    }
+
+
+def run_benchmark(sets, solvers=None, heuristics=None, time_limit=60.0, korf_path=None, korf_limit=None,
+                  pdb_directory='.', log=sys.stderr):
+    """
+        Runs every requested solver/heuristic pair on every requested set and returns the report dict.
+        solvers and heuristics default to the pairs in DEFAULT_RUNS for each set.
+        ('bidirectional' ignores the heuristic, so it only runs once per set.)
+    """
+    # spawned, because a forked child starts out sharing (and counting) all of the parent's pages
+    context = multiprocessing.get_context('spawn')
+    report = {
+        'meta': {'python': platform.python_version(), 'machine': platform.machine(),
+                 'time_limit': time_limit, 'started': time.strftime('%Y-%m-%dT%H:%M:%S')},
+        'runs': [],
+    }
+    for set_name in sets:
+        goal_board, boards, optimal = instance_set(set_name, korf_path, korf_limit)
+        shape = (len(goal_board.matrix), len(goal_board.matrix[0]))
+        instances = [board.tiles() for board in boards]
+        default_solvers, default_heuristics = DEFAULT_RUNS[set_name]
+        for solver in solvers or default_solvers:
+            for heuristic in heuristics or default_heuristics:
+                if solver == 'bidirectional' and heuristic != (heuristics or default_heuristics)[0]:
+                    continue
+                with context.Pool(1) as pool:
+                    results, peak_rss_kb = pool.apply(_run_combination, (
+                        goal_board.tiles(), instances, shape, solver, heuristic, time_limit, pdb_directory))
+                if optimal is not None:
+                    for result in results:
+                        result['optimal'] = optimal[result['instance']]
+                run = {'set': set_name, 'solver': solver,
+                       'heuristic': None if solver == 'bidirectional' else heuristic,
+                       'summary': summarize(results, peak_rss_kb), 'results': results}
+                report['runs'].append(run)
+                if log is not None:
+                    print(_format_run(run), file=log)
+    return report
+
+
+#################################
+# Reporting and Comparison
+#################################
+
+def _key(run):
+    return (run['set'], run['solver'], run['heuristic'])
+
+
+def _format_run(run):
+    s = run['summary']
+    nps = f"{s['nodes_per_sec']:.0f}" if s['nodes_per_sec'] is not None else '-'
+    return (f"{run['set']:16} {run['solver']:14} {str(run['heuristic']):16} "
+            f"solved {s['solved']}/{s['instances']}  {s['seconds']:8.2f}s  "
+            f"exp {str(s['expansions']):>9}  nodes/s {nps:>8}  rss {s['peak_rss_kb']} KB"
+            + (f"  longer than optimal {s['suboptimal']}" if s.get('suboptimal') is not None else ''))
+
+
+def compare(report, baseline, tolerance=0.10, out=sys.stdout):
+    """
+        Prints the ratio (new / baseline) of time, expansions and peak RSS for every run that appears in
+        both reports, and returns the runs that got slower, expanded more nodes or solved fewer instances
+        by more than tolerance.
+    """
+    old_runs = {_key(run): run['summary'] for run in baseline['runs']}
+    regressions = []
+    for run in report['runs']:
+        old = old_runs.get(_key(run))
+        if old is None:
+            continue
+        new = run['summary']
+        ratios = {}
+        for field in ('seconds', 'expansions', 'peak_rss_kb'):
+            if new[field] is not None and old[field]:
+                ratios[field] = new[field] / old[field]
+        text = '  '.join(f'{field} x{ratio:.2f}' for field, ratio in ratios.items())
+        print(f"{run['set']:16} {run['solver']:14} {str(run['heuristic']):16} {text}", file=out)
+        if (new['solved'] < old['solved'] or ratios.get('seconds', 1) > 1 + tolerance
+                or ratios.get('expansions', 1) > 1 + tolerance):
+            regressions.append(_key(run))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the sliding-puzzle solvers.')
+    parser.add_argument('--sets', nargs='+', choices=SETS,
+                        default=['8-puzzle-depths', '8-puzzle-walks', '15-puzzle-walks', 'korf100-easy'])
+    parser.add_argument('--solvers', nargs='+', choices=SOLVERS, default=None)
+    parser.add_argument('--heuristics', nargs='+', choices=HEURISTICS, default=None)
+    parser.add_argument('--time-limit', type=float, default=60.0, help='seconds per instance')
+    parser.add_argument('--korf', help='read the korf100 set from this file instead of the built-in table')
+    parser.add_argument('--korf-limit', type=int, default=None, help='only run the first N Korf instances')
+    parser.add_argument('--pdb-directory', default='.', help='where pattern databases are stored')
+    parser.add_argument('--output', help='write the JSON report here')
+    parser.add_argument('--compare', help='a saved report to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.10, help='allowed slowdown before a run counts as a regression')
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(args.sets, args.solvers, args.heuristics, args.time_limit, args.korf, args.korf_limit,
+                           args.pdb_directory)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=1)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        if regressions:
+            print(f'{len(regressions)} regression(s): {regressions}', file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,260 @@
+#!/usr/bin/python3
+
+##################################
+# Parallel Sliding-Puzzle Solver
+##################################
+# Hash-distributed A* (HDA*): one hard instance is solved by several worker processes at once.
+#
+# Every board is owned by exactly one worker, picked by hashing its packed state, and only the
+# owner keeps it in an open or closed list. A worker that generates a child owned by someone else
+# buffers it and sends it in batches through the owner's queue, so duplicate detection stays
+# local and no lists are shared. States carry their own path (two bits per move), so no worker
+# ever needs another worker's parent pointers.
+#
+# The first goal found gives an upper bound (the incumbent) that every worker prunes against.
+# Search ends when no worker holds a State with f below the incumbent and no batch is in flight,
+# which the parent detects by counting batches sent and received in two consecutive waves;
+# the incumbent is then an optimal solution length.
+#
+# Usage:
+#     python parallel_solver.py "5 1 2 3 9 6 7 4 13 10 11 8 0 14 15 12" --processes 8
+
+import argparse
+import heapq
+import multiprocessing
+import queue
+import sys
+import time
+
+import Board
+import State
+import batch_solver
+
+MOVES = [(0, 1), (0, -1), (1, 0), (-1, 0)]
+NO_SOLUTION = (1 << 31) - 1
+# how long hda_star waits on the results queue before checking whether its workers are still alive
+RESULT_POLL_SECONDS = 1.0
+
+
+# returns the worker that owns a packed state (a multiplicative hash, so neighboring states spread out)
+def owner_of(state, processes):
+    return ((state * 0x9E3779B97F4A7C15) >> 17) % processes
+
+
+# the loop run by each worker process
+def _search_worker(index, processes, goal_board, heuristic, inboxes, results, shared, batch_size, poll_interval):
+    incumbent, stop, idle, sent, received = shared
+    geometry = goal_board.geometry
+    goal = goal_board.state
+    update = getattr(heuristic, 'update', None)
+    inbox = inboxes[index]
+    outbound = [[] for _ in range(processes)]
+    fringe = []
+    bestG = {}
+    expansions = 0
+
+    # adds a State (state, blankIdx, g, h, path) that this worker owns
+    def consider(node, bound):
+        state, blank, g, h, path = node
+        if bestG.get(state, NO_SOLUTION) <= g or g + h >= bound:
+            return
+        bestG[state] = g
+        heapq.heappush(fringe, (g + h, -g, state, blank, h, path))
+
+    def send(owner):
+        sent[index] += 1
+        inboxes[owner].put(outbound[owner])
+        outbound[owner] = []
+
+    while not stop.is_set():
+        # Take in every batch that has arrived; wait briefly for one if there is nothing to do
+        while True:
+            try:
+                batch = inbox.get(timeout=0.01) if idle[index] else inbox.get_nowait()
+            except queue.Empty:
+                break
+            idle[index] = 0
+            received[index] += 1
+            bound = incumbent.value
+            for node in batch:
+                consider(node, bound)
+        if stop.is_set():
+            break
+
+        bound = incumbent.value
+        for _ in range(poll_interval):
+            if not fringe:
+                break
+            f, negative_g, state, blank, h, path = heapq.heappop(fringe)
+            if f >= bound:
+                fringe.clear()
+                break
+            g = -negative_g
+            if bestG[state] < g:
+                continue
+            if state == goal:
+                with incumbent.get_lock():
+                    if g < incumbent.value:
+                        incumbent.value = g
+                        results.put((g, path))
+                bound = incumbent.value
+                continue
+            expansions += 1
+            board = Board.PackedBoard.from_state(state, blank, geometry)
+            previous = path & 3 if g else None
+            for k, move in enumerate(MOVES):
+                if previous is not None and k == previous ^ 1:
+                    continue
+                child = board.slide_blank(move)
+                if child is None:
+                    continue
+                child_h = heuristic(child, goal_board) if update is None else update(h, board, child)
+                if g + 1 + child_h >= bound:
+                    continue
+                node = (child.state, child.blankIdx, g + 1, child_h, (path << 2) | k)
+                owner = owner_of(child.state, processes)
+                if owner == index:
+                    consider(node, bound)
+                else:
+                    outbound[owner].append(node)
+                    if len(outbound[owner]) >= batch_size:
+                        send(owner)
+
+        # Flush partly filled batches so other workers are never starved, then report idleness
+        for owner in range(processes):
+            if outbound[owner]:
+                send(owner)
+        if not fringe:
+            idle[index] = 1
+    results.put(('expansions', index, expansions))
+
+
+def hda_star(start_board, goal_board, heuristic, processes=None, batch_size=256, poll_interval=64, stats=None):
+    """
+        Solves one board with HDA* on processes worker processes (default: the CPU count) and returns
+        the Goal State, with the same optimal depth informed_solver would find, or None.
+        heuristic must be admissible and accept PackedBoards (ManhattanHeuristic,
+        LinearConflictHeuristic and PatternDatabase.AdditivePatternDatabase all do).
+
+        batch_size is how many States a worker collects for another worker before sending them;
+        poll_interval is how many States a worker expands between checks of its queue.
+        A caller may pass a stats dict, which is filled with 'expansions' (a list, one count per
+        worker) and 'batches' (the number of batches exchanged).
+        Workers are forked where possible, so the heuristic's tables are shared rather than copied.
+    """
+    if not start_board.is_solvable(goal_board):
+        return None
+    start = start_board if isinstance(start_board, Board.PackedBoard) else start_board.pack()
+    goal = goal_board if isinstance(goal_board, Board.PackedBoard) else goal_board.pack()
+    processes = processes or multiprocessing.cpu_count()
+    context = multiprocessing.get_context('fork' if 'fork' in multiprocessing.get_all_start_methods() else None)
+
+    incumbent = context.Value('l', NO_SOLUTION)
+    stop = context.Event()
+    # idle[i], sent[i] and received[i] are only written by worker i; slot processes is the parent's
+    idle = context.Array('b', processes, lock=False)
+    sent = context.Array('q', processes + 1, lock=False)
+    received = context.Array('q', processes, lock=False)
+    inboxes = [context.Queue() for _ in range(processes)]
+    results = context.Queue()
+    shared = (incumbent, stop, idle, sent, received)
+
+    sent[processes] = 1
+    inboxes[owner_of(start.state, processes)].put([(start.state, start.blankIdx, 0, heuristic(start, goal), 0)])
+    workers = [context.Process(target=_search_worker, daemon=True,
+                               args=(index, processes, goal, heuristic, inboxes, results, shared,
+                                     batch_size, poll_interval))
+               for index in range(processes)]
+    for worker in workers:
+        worker.start()
+
+    # Four-counter termination detection: stop only after two waves in a row see every worker idle
+    # and the same, equal totals of batches sent and received
+    try:
+        previous = None
+        while True:
+            time.sleep(0.005)
+            if any(worker.exitcode not in (None, 0) for worker in workers):
+                raise RuntimeError("An HDA* worker process failed")
+            if not all(idle):
+                previous = None
+                continue
+            wave = (sum(sent), sum(received))
+            if wave[0] == wave[1] and wave == previous:
+                break
+            previous = wave
+        stop.set()
+
+        # Collect the solutions and every worker's final count, without waiting on a worker that died
+        best = None
+        reported = set()
+        expansions = [0] * processes
+        while len(reported) < processes:
+            try:
+                message = results.get(timeout=RESULT_POLL_SECONDS)
+            except queue.Empty:
+                missing = [workers[index] for index in range(processes) if index not in reported]
+                if any(worker.exitcode not in (None, 0) for worker in missing):
+                    raise RuntimeError("An HDA* worker process failed")
+                if not any(worker.is_alive() for worker in missing):
+                    break
+                continue
+            if message[0] == 'expansions':
+                expansions[message[1]] = message[2]
+                reported.add(message[1])
+            elif best is None or message[0] < best[0]:
+                best = message
+    finally:
+        stop.set()
+        for worker in workers:
+            worker.join(RESULT_POLL_SECONDS)
+            if worker.is_alive():
+                worker.terminate()
+                worker.join()
+    if stats is not None:
+        stats['expansions'] = expansions
+        stats['batches'] = sum(sent) - 1
+
+    if best is None:
+        return None
+    length, path = best
+    moves = [MOVES[(path >> (2 * (length - 1 - i))) & 3] for i in range(length)]
+    board = start
+    current = State.State(board, None, 0, heuristic(board, goal))
+    for depth, move in enumerate(moves, 1):
+        board = board.slide_blank(move)
+        current = State.State(board, current, depth, depth + heuristic(board, goal))
+    return current
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Solve one sliding puzzle with parallel A* (HDA*).')
+    parser.add_argument('board', help='start board tiles in row-major order, 0 for the blank')
+    parser.add_argument('--shape', help='board shape as ROWSxCOLS (default: square)')
+    parser.add_argument('--goal', help='goal board tiles (default: 1..n with the blank last)')
+    parser.add_argument('--heuristic', choices=batch_solver.HEURISTICS, default='linear-conflict')
+    parser.add_argument('--processes', type=int, default=None, help='worker count (default: CPU count)')
+    parser.add_argument('--batch-size', type=int, default=256, help='States per message between workers')
+    parser.add_argument('--pdb-directory', default='.', help='where pattern databases are stored')
+    args = parser.parse_args(argv)
+
+    shape = tuple(int(n) for n in args.shape.lower().split('x')) if args.shape else None
+    start_board = batch_solver.parse_board(args.board, shape)
+    shape = (len(start_board.matrix), len(start_board.matrix[0]))
+    goal_board = batch_solver.parse_board(args.goal, shape) if args.goal else batch_solver.standard_goal(*shape)
+    heuristic = batch_solver.make_heuristic(args.heuristic, goal_board, None, args.pdb_directory)
+    stats = {}
+    started = time.perf_counter()
+    found = hda_star(start_board, goal_board, heuristic, args.processes, args.batch_size, stats=stats)
+    elapsed = time.perf_counter() - started
+    if found is None:
+        print('No solution', file=sys.stderr)
+        return 1
+    found.printPath()
+    print(f'{found.depth} moves, {sum(stats["expansions"])} expansions {stats["expansions"]}, '
+          f'{stats["batches"]} batches, {elapsed:.2f}s', file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
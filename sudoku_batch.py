@@ -0,0 +1,188 @@
+#!/usr/bin/python3
+
+##################################
+# Batch Sudoku Solver
+##################################
+# Solves a file of Sudoku puzzles across a pool of worker processes.
+#
+# Input, in either (or a mix) of two formats, read lazily one puzzle at a time:
+#   - one 9x9 puzzle per line: 81 characters, digits with '.' or '0' for an empty space
+#   - CSV blocks as read by a2_PeterManolis.Board: n2 lines of n2 comma-separated values
+#     ('' for an empty space), with blocks separated by blank lines; any size works
+# Lines starting with '#' are skipped.
+#
+# Output: one line per puzzle, in input order. A 9x9 solution is written as 81 digits; larger
+# solutions as n^4 comma-separated values in row-major order; a puzzle with no solution as
+# 'unsolvable', one that ran past the time limit as 'timeout', and one that could not be read or
+# solved as 'error: ...'.
+#
+# Puzzles are sent to the workers in chunks, and at most max_in_flight chunks are ever waiting or
+# being solved. Results are written as soon as the oldest chunk is done, so the reader, the workers
+# and the writer stay in step and memory stays flat however long the file is. Since results are
+# written in order, a per-puzzle time limit keeps one very hard puzzle from holding up the rest.
+#
+# Usage:
+#     python sudoku_batch.py puzzles.txt solutions.txt --processes 8 --dlx --time-limit 5
+
+import argparse
+import collections
+import multiprocessing
+import signal
+import sys
+import time
+
+import a2_PeterManolis as a2
+
+# the Solver and time limit used by a worker process; set by _init_worker
+_worker = {}
+
+
+class PuzzleTimeout(Exception):
+    pass
+
+
+# yields (index, rows, problem) for every puzzle in the file, where rows is in the form Board(rows=...)
+# takes; a puzzle that cannot be read has rows None and problem saying why, so it still gets its line
+def read_puzzles(path):
+    with open(path) as f:
+        index = 0
+        block = []
+        for line in f:
+            line = line.strip()
+            if line.startswith('#'):
+                continue
+            if ',' in line:
+                block.append(line.split(','))
+                if len(block) == len(block[0]):
+                    yield index, block, None
+                    index += 1
+                    block = []
+                continue
+            if block:
+                yield index, None, f'puzzle ends after {len(block)} of {len(block[0])} rows'
+                index += 1
+                block = []
+            if not line:
+                continue
+            if len(line) != 81:
+                yield index, None, f'puzzle has {len(line)} characters instead of 81'
+            else:
+                cells = ['' if ch in '.0' else ch for ch in line]
+                yield index, [cells[r * 9:(r + 1) * 9] for r in range(9)], None
+            index += 1
+        if block:
+            yield index, None, f'puzzle ends after {len(block)} of {len(block[0])} rows'
+
+
+# writes a solved board as one line (see the format above)
+def format_solution(board):
+    values = [board.board[(r, c)] for r in range(board.n2) for c in range(board.n2)]
+    if board.n2 == 9:
+        return ''.join(map(str, values))
+    return ','.join(map(str, values))
+
+
+def _raise_timeout(signum, frame):
+    raise PuzzleTimeout()
+
+
+def _init_worker(settings):
+    _worker['solver'] = a2.Solver(settings['propagate'], settings['pairs'], settings['dlx'])
+    _worker['time_limit'] = settings['time_limit']
+    signal.signal(signal.SIGALRM, _raise_timeout)
+
+
+# the task run by the pool for each chunk; returns (status, output line) for each puzzle
+def _solve_chunk(chunk):
+    solver = _worker['solver']
+    results = []
+    for index, rows, problem in chunk:
+        if problem is not None:
+            results.append(('error', f'error: {problem}'))
+            continue
+        if _worker['time_limit'] is not None:
+            signal.setitimer(signal.ITIMER_REAL, _worker['time_limit'])
+        try:
+            board = a2.Board(rows=rows)
+            if solver.solveBoard(board):
+                results.append(('solved', format_solution(board)))
+            else:
+                results.append(('unsolvable', 'unsolvable'))
+        except PuzzleTimeout:
+            results.append(('timeout', 'timeout'))
+        except Exception as error:
+            results.append(('error', f'error: {error}'))
+        finally:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    return results
+
+
+# groups the puzzles into lists of up to size
+def _chunks(puzzles, size):
+    chunk = []
+    for puzzle in puzzles:
+        chunk.append(puzzle)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def run_batch(input_path, output, processes=None, chunk_size=64, max_in_flight=None,
+              propagate=True, pairs=False, dlx=False, time_limit=None):
+    """
+        Solves every puzzle in input_path on a pool of processes and writes one line per puzzle to the
+        open file output, in input order. At most max_in_flight chunks of chunk_size puzzles are queued
+        or being solved at once (default: four per process). time_limit is in seconds per puzzle;
+        None means no limit. Returns a dict counting the results.
+    """
+    settings = {'propagate': propagate, 'pairs': pairs, 'dlx': dlx, 'time_limit': time_limit}
+    processes = processes or multiprocessing.cpu_count()
+    max_in_flight = max_in_flight or 4 * processes
+    counts = {'solved': 0, 'unsolvable': 0, 'timeout': 0, 'error': 0}
+    pending = collections.deque()
+
+    def write(results):
+        for status, line in results:
+            output.write(line + '\n')
+            counts[status] += 1
+
+    with multiprocessing.Pool(processes, initializer=_init_worker, initargs=(settings,)) as pool:
+        for chunk in _chunks(read_puzzles(input_path), chunk_size):
+            if len(pending) >= max_in_flight:
+                write(pending.popleft().get())
+            pending.append(pool.apply_async(_solve_chunk, (chunk,)))
+        while pending:
+            write(pending.popleft().get())
+    output.flush()
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Solve many Sudoku puzzles in parallel.')
+    parser.add_argument('input', help='file of puzzles (81-character lines or CSV blocks)')
+    parser.add_argument('output', help="solutions file, or '-' for stdout")
+    parser.add_argument('--processes', type=int, default=None, help='worker count (default: CPU count)')
+    parser.add_argument('--chunk-size', type=int, default=64, help='puzzles sent to a worker at once')
+    parser.add_argument('--max-in-flight', type=int, default=None,
+                        help='chunks queued or being solved at once (default: 4 per process)')
+    parser.add_argument('--dlx', action='store_true', help='solve with Dancing Links instead of backtracking')
+    parser.add_argument('--pairs', action='store_true', help='also propagate naked and pointing pairs')
+    parser.add_argument('--no-propagate', action='store_true', help='plain backtracking without propagation')
+    parser.add_argument('--time-limit', type=float, default=None, help='seconds per puzzle')
+    args = parser.parse_args(argv)
+
+    output = sys.stdout if args.output == '-' else open(args.output, 'w')
+    started = time.perf_counter()
+    try:
+        counts = run_batch(args.input, output, args.processes, args.chunk_size, args.max_in_flight,
+                           not args.no_propagate, args.pairs, args.dlx, args.time_limit)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    print(f'{counts} in {time.perf_counter() - started:.2f}s', file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()